@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import json_codec  # noqa: E402
+
+
+def build_dgpage_payload(months: int, users: int) -> bytes:
+    records: List[Dict[str, Any]] = []
+    for user_index in range(users):
+        for month_index in range(months):
+            for day in range(1, 32):
+                records.append(
+                    {
+                        "SIGNTIME": f"2025-{month_index % 12 + 1:02d}-{day:02d}",
+                        "SIGNINTIME": f"08:{random.randint(0, 59):02d}:{random.randint(0, 59):02d}",
+                        "SIGNOUTTIME": f"18:{random.randint(0, 59):02d}:{random.randint(0, 59):02d}",
+                        "USER_ID": f"user-{user_index:04d}",
+                        "USER_NAME": f"测试用户{user_index}",
+                        "ADDRESS": "济南市高新区浪潮科技园S01栋",
+                        "LONGITUDE": "117.128425",
+                        "LATITUDE": "36.662003",
+                    }
+                )
+    payload = {"dgpage": records, "total": len(records), "success": True}
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def build_response(content: bytes) -> requests.Response:
+    response = requests.Response()
+    response._content = content
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对比 dgpage 响应的 JSON 解析耗时")
+    parser.add_argument("--months", type=int, default=24, help="每个用户的月份数")
+    parser.add_argument("--users", type=int, default=20, help="用户数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一次")
+    args = parser.parse_args()
+
+    content = build_dgpage_payload(args.months, args.users)
+    print(f"payload: {len(content) / 1024 / 1024:.2f} MiB")
+
+    baseline = measure(lambda: build_response(content).json(), args.repeat)
+    print(f"{'requests.Response.json':<24} {baseline * 1000:9.2f} ms   1.00x")
+
+    for backend in json_codec.available_backends():
+        json_codec.set_backend(backend)
+        elapsed = measure(
+            lambda: json_codec.decode_response(build_response(content)), args.repeat
+        )
+        print(f"{backend:<24} {elapsed * 1000:9.2f} ms {baseline / elapsed:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
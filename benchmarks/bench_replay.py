@@ -0,0 +1,58 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inspur.inspur_client import InspurClient  # noqa: E402
+from inspur.rate_limiter import configure_rate_limits  # noqa: E402
+from inspur.transport import Cassette, ReplayTransport  # noqa: E402
+
+
+def run_session(
+    cassette_path: str, speed: float, phone: str, password: str, months: List[str]
+) -> float:
+    cassette = Cassette.load(cassette_path)
+    client = InspurClient(
+        client_uuid="bench", transport=ReplayTransport(cassette, speed)
+    )
+    client.http_cache = None
+    start = time.perf_counter()
+    try:
+        client.login(phone, password, silent=True)
+        for month in months:
+            client.fetch_monthly_attendance(month)
+    finally:
+        client.close()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="使用回放文件离线测量登录与考勤查询耗时")
+    parser.add_argument("cassette", help="--record 录制的回放文件")
+    parser.add_argument("--phone", required=True, help="录制时使用的手机号")
+    parser.add_argument("--password", required=True, help="录制时使用的密码")
+    parser.add_argument(
+        "--months", nargs="+", default=[time.strftime("%Y-%m")], help="查询的月份"
+    )
+    parser.add_argument("--speed", type=float, default=0, help="回放速度倍数")
+    parser.add_argument("--repeat", type=int, default=10, help="重复次数")
+    args = parser.parse_args()
+    configure_rate_limits({"requests_per_second": 0})
+
+    timings = [
+        run_session(args.cassette, args.speed, args.phone, args.password, args.months)
+        for _ in range(args.repeat)
+    ]
+    print(
+        f"runs={len(timings)} min={min(timings) * 1000:.2f} ms "
+        f"median={statistics.median(timings) * 1000:.2f} ms "
+        f"max={max(timings) * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
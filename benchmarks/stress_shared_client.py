@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from loguru import logger
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inspur.attendance_snapshot import AttendanceSnapshotStore  # noqa: E402
+from inspur.inspur_client import (ATTENDANCE_CREATE_ENDPOINT,  # noqa: E402
+                                  ATTENDANCE_RECORDS_ENDPOINT, InspurClient)
+from inspur.models import AttendanceSite  # noqa: E402
+from inspur.rate_limiter import configure_rate_limits  # noqa: E402
+from inspur.transport import (FakeTransport, RequestsTransport,  # noqa: E402
+                              Transport)
+
+LOGIN_ENDPOINT = "/urms/plugins/user/usermgr/login.ilf"
+SITES_ENDPOINT = "/urms/plugins/check/tcheckattendancesite/findForPhone.ilf"
+SESSION_COOKIE = "JSESSIONID=stress"
+MONTHS = [f"2025-{month:02d}" for month in range(1, 13)]
+SITES = [
+    AttendanceSite(str(index), "36.66", "117.12", f"考勤点{index}")
+    for index in range(4)
+]
+
+
+def records_handler(method: str, url: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    params = kwargs.get("params") or dict(parse_qsl(urlsplit(url).query))
+    month = params["month"]
+    return {
+        "dgpage": [
+            {
+                "SIGNTIME": f"{month}-{day:02d}",
+                "SIGNINTIME": "08:30:00",
+                "SIGNOUTTIME": "18:00:00",
+                "MONTH": month,
+                "USER_ID": params["userId"],
+            }
+            for day in range(1, 29)
+        ]
+    }
+
+
+ROUTES = {
+    ("POST", LOGIN_ENDPOINT): {
+        "status": "success",
+        "result": {"PHONE": "138", "USER_ID": "u-1", "USER_NAME": "压测"},
+    },
+    ("GET", ATTENDANCE_RECORDS_ENDPOINT): records_handler,
+    ("GET", SITES_ENDPOINT): {"attendanceSites": [site.to_dict() for site in SITES]},
+    ("POST", ATTENDANCE_CREATE_ENDPOINT): {"success": True},
+}
+
+
+class StressHandler(BaseHTTPRequestHandler):
+    # 登录时下发会话 Cookie，之后的请求缺少 Cookie 时返回 401，
+    # 用于检查多个 Session 之间共享的 Cookie 是否一致
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _handle(self, method: str) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if self.latency:
+            time.sleep(self.latency)
+
+        path = urlsplit(self.path).path
+        result = ROUTES.get((method, path))
+        if callable(result):
+            result = result(method, self.path, {})
+        status = 200 if result is not None else 404
+        if path != LOGIN_ENDPOINT and SESSION_COOKIE not in (
+            self.headers.get("Cookie") or ""
+        ):
+            status, result = 401, {"error": "缺少会话 Cookie"}
+
+        body = json.dumps(result or {}, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        if path == LOGIN_ENDPOINT:
+            self.send_header("Set-Cookie", f"{SESSION_COOKIE}; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+
+def start_server(latency: float) -> ThreadingHTTPServer:
+    StressHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StressHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_client(
+    latency: float, server: Optional[ThreadingHTTPServer] = None
+) -> InspurClient:
+    if server is None:
+        transport: Transport = FakeTransport(ROUTES, latency=latency)
+        base_url = "http://stress.invalid"
+    else:
+        transport = RequestsTransport()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    client = InspurClient(
+        base_url=base_url,
+        client_uuid="stress",
+        snapshot_store=AttendanceSnapshotStore(),
+        transport=transport,
+    )
+    client.http_cache = None
+    client.outbox = None
+    client.login("13800000000", "stress", silent=True)
+    return client
+
+
+def worker(client: InspurClient, iterations: int, errors: List[str]) -> int:
+    operations = 0
+    for _ in range(iterations):
+        choice = random.random()
+        try:
+            if choice < 0.6:
+                month = random.choice(MONTHS)
+                snapshot = client.fetch_monthly_attendance(month)
+                if any(record.extra["MONTH"] != month for record in snapshot.records):
+                    errors.append(f"{month} 返回了其他月份的记录")
+            elif choice < 0.8:
+                client.attendance_site = random.choice(SITES)
+                state = client.state
+                if state.attendance_site not in SITES:
+                    errors.append("考勤点状态不一致")
+            elif choice < 0.9:
+                sites = client.get_attendance_sites(117.12, 36.66)
+                if len(sites.get("attendanceSites", [])) != len(SITES):
+                    errors.append("考勤点数量不一致")
+            else:
+                result = client.check_in(site=random.choice(SITES))
+                if not result.get("success"):
+                    errors.append(f"签到失败: {result}")
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        operations += 1
+    return operations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="多线程共享同一个 InspurClient 的压力测试")
+    parser.add_argument("--threads", type=int, default=32, help="线程数")
+    parser.add_argument("--iterations", type=int, default=200, help="每个线程的操作次数")
+    parser.add_argument("--latency", type=float, default=0.001, help="模拟响应耗时（秒）")
+    parser.add_argument(
+        "--transport",
+        choices=("requests", "fake"),
+        default="requests",
+        help="requests: 通过本地 HTTP 服务使用真实连接；fake: 进程内模拟",
+    )
+    args = parser.parse_args()
+
+    logger.remove()
+    configure_rate_limits({"requests_per_second": 0})
+    server = start_server(args.latency) if args.transport == "requests" else None
+    client = build_client(args.latency, server)
+    errors: List[str] = []
+    lock = threading.Lock()
+
+    def run() -> int:
+        local_errors: List[str] = []
+        count = worker(client, args.iterations, local_errors)
+        with lock:
+            errors.extend(local_errors)
+        return count
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        total = sum(executor.map(lambda _: run(), range(args.threads)))
+    elapsed = time.perf_counter() - start
+    client.close()
+    if server is not None:
+        server.shutdown()
+
+    print(f"operations={total} elapsed={elapsed:.2f}s ops/s={total / elapsed:.0f}")
+    print(f"errors={len(errors)}")
+    for error in errors[:10]:
+        print(f"  {error}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
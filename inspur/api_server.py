@@ -0,0 +1,447 @@
+import json
+import secrets
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from inspur.attendance_verifier import AttendanceVerifier
+from inspur.circuit_breaker import CircuitOpenError
+from inspur.config_manager import ConfigManager, get_config_manager
+from inspur.config_watcher import ConfigChanges, ConfigWatcher
+from inspur.deadline import DeadlineExceededError, deadline_scope
+from inspur.endpoint_selector import endpoint_snapshots
+from inspur.inspur_client import InspurClient, generate_mobile_uuid, md5_encrypt
+from inspur.login_manager import LoginManager
+from inspur.models import AttendanceSite
+from inspur.outbox_drainer import OutboxDrainer
+from inspur.rate_limiter import configure_rate_limits
+from utils.constants import (API_CLIENT_IDLE_TIMEOUT, API_POOL_REAP_INTERVAL,
+                             API_SERVER_HOST, API_SERVER_PORT,
+                             ATTENDANCE_ACTION_DEADLINE)
+from utils.logger import get_logger, setup_logging
+from utils.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class PooledClient:
+    def __init__(
+        self, client: InspurClient, encrypted_phone: str, encrypted_password: str
+    ):
+        self.client = client
+        self.encrypted_phone = encrypted_phone
+        self.encrypted_password = encrypted_password
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def touch(self) -> None:
+        self.last_used = time.monotonic()
+
+
+class ClientPool:
+    def __init__(
+        self,
+        config_manager: ConfigManager,
+        idle_timeout: float = API_CLIENT_IDLE_TIMEOUT,
+        reap_interval: float = API_POOL_REAP_INTERVAL,
+    ):
+        self.config_manager = config_manager
+        self.login_manager = LoginManager(config_manager)
+        self.verifier = AttendanceVerifier()
+        self.outbox_drainer = OutboxDrainer()
+        self.config_watcher = ConfigWatcher(config_manager)
+        self.config_watcher.subscribe(self.apply_config_changes)
+        self.idle_timeout = idle_timeout
+        self.reap_interval = reap_interval
+        self._entries: Dict[str, PooledClient] = {}
+        self._tokens_by_user: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._config_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._reaper = threading.Thread(
+            target=self._reap_loop, name="inspur-pool-reaper", daemon=True
+        )
+
+    def start(self) -> None:
+        self._reaper.start()
+        self.outbox_drainer.start()
+        self.config_watcher.start()
+
+    def apply_config_changes(self, changes: ConfigChanges) -> None:
+        if "log_level" in changes:
+            setup_logging(changes["log_level"][1])
+        if "rate_limit" in changes:
+            configure_rate_limits(changes["rate_limit"][1])
+        if "random_radius_meters" in changes:
+            with self._lock:
+                clients = [entry.client for entry in self._entries.values()]
+            for client in clients:
+                client.random_radius_meters = changes["random_radius_meters"][1]
+
+    def login(
+        self, phone: str, password: str, is_encrypted: bool = False
+    ) -> Tuple[str, PooledClient]:
+        encrypted_phone = phone if is_encrypted else md5_encrypt(phone)
+        encrypted_password = password if is_encrypted else md5_encrypt(password)
+
+        with self._lock:
+            token = self._tokens_by_user.get(encrypted_phone)
+            entry = self._entries.get(token) if token else None
+            if entry and entry.encrypted_password == encrypted_password:
+                entry.touch()
+                return token, entry
+
+        with self._config_lock:
+            login_result = self.login_manager.login_with_credentials(
+                encrypted_phone, encrypted_password, is_encrypted=True
+            )
+        if not login_result["success"]:
+            raise ApiError(401, login_result.get("error", "登录失败"))
+
+        client: InspurClient = login_result["logged_in_inspur"]
+        if client.client_uuid is None:
+            client.client_uuid = generate_mobile_uuid()
+            with self._config_lock:
+                self.config_manager.save_client_uuid(
+                    encrypted_phone, client.client_uuid
+                )
+
+        entry = PooledClient(client, encrypted_phone, encrypted_password)
+        token = secrets.token_urlsafe(24)
+        with self._lock:
+            old_token = self._tokens_by_user.pop(encrypted_phone, None)
+            old_entry = self._entries.pop(old_token, None) if old_token else None
+            self._entries[token] = entry
+            self._tokens_by_user[encrypted_phone] = token
+
+        if old_entry:
+            self.outbox_drainer.unregister(old_entry.client)
+            with old_entry.lock:
+                old_entry.client.close()
+        self.outbox_drainer.register(client, entry.lock)
+        logger.info("API 登录成功: {}", client.user_info.user_name)
+        return token, entry
+
+    def acquire(self, token: str) -> PooledClient:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                raise ApiError(401, "会话不存在或已过期，请重新登录")
+            entry.touch()
+            return entry
+
+    def logout(self, token: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(token, None)
+            if entry:
+                self._tokens_by_user.pop(entry.encrypted_phone, None)
+        if entry:
+            self.outbox_drainer.unregister(entry.client)
+            # 等待该客户端上正在进行的请求结束后再关闭传输层
+            with entry.lock:
+                entry.client.purge_cached_responses()
+                entry.client.close()
+
+    def evict_idle(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                token
+                for token, entry in self._entries.items()
+                if now - entry.last_used > self.idle_timeout
+                and not entry.lock.locked()
+            ]
+            evicted = [self._entries.pop(token) for token in expired]
+            for entry in evicted:
+                self._tokens_by_user.pop(entry.encrypted_phone, None)
+
+        for entry in evicted:
+            self.outbox_drainer.unregister(entry.client)
+            entry.client.close()
+        if evicted:
+            logger.info("已回收 {} 个空闲客户端", len(evicted))
+        return len(evicted)
+
+    def _reap_loop(self) -> None:
+        while not self._stop_event.wait(self.reap_interval):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.warning("回收空闲客户端失败: {}", e)
+
+    def close(self) -> None:
+        self._stop_event.set()
+        self.config_watcher.stop()
+        self.verifier.shutdown()
+        self.outbox_drainer.shutdown()
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._tokens_by_user.clear()
+        for entry in entries:
+            entry.client.close()
+
+    def resolve_site(
+        self, address: Optional[str], is_checkout: bool
+    ) -> AttendanceSite:
+        with self._config_lock:
+            if address:
+                attendance_sites = self.config_manager.load_attendance_sites()
+            elif is_checkout:
+                attendance_sites, address = self.config_manager.load_checkout_site()
+            else:
+                attendance_sites, address = self.config_manager.load_checkin_site()
+
+        if not address or address not in attendance_sites:
+            raise ApiError(400, "未找到考勤点，请先在交互模式中选择或指定 address")
+
+        return AttendanceSite.from_config(address, attendance_sites[address])
+
+
+class InspurApiHandler(BaseHTTPRequestHandler):
+    server_version = "PyInspurAPI/0.1"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def pool(self) -> ClientPool:
+        return self.server.pool
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("{} - {}", self.address_string(), format % args)
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        self._raw_body = b""
+        parsed = urlparse(self.path)
+        route = self.ROUTES.get((method, parsed.path.rstrip("/")))
+        try:
+            self._raw_body = self._read_raw_body()
+            if route is None:
+                raise ApiError(404, "接口不存在")
+            query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+            status, payload = route(self, query)
+        except ApiError as e:
+            status, payload = e.status, {"success": False, "error": e.message}
+        except CircuitOpenError as e:
+            status, payload = 503, {"success": False, "error": str(e)}
+        except DeadlineExceededError as e:
+            status, payload = 504, {"success": False, "error": str(e)}
+        except requests.exceptions.RequestException as e:
+            status, payload = 502, {"success": False, "error": str(e)}
+        except Exception as e:
+            logger.exception("API 请求处理失败")
+            status, payload = 500, {"success": False, "error": str(e)}
+        self._send_json(status, payload)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_raw_body(self) -> bytes:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # 无法确定请求体边界，回复后关闭连接
+            self.close_connection = True
+            raise ApiError(400, "Content-Length 无效")
+        return self.rfile.read(length) if length else b""
+
+    def _read_json_body(self) -> Dict[str, Any]:
+        if not self._raw_body:
+            return {}
+        try:
+            body = json.loads(self._raw_body)
+        except ValueError:
+            raise ApiError(400, "请求体不是有效的 JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "请求体必须是 JSON 对象")
+        return body
+
+    def _authenticated_entry(self) -> Tuple[str, PooledClient]:
+        authorization = self.headers.get("Authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        token = token.strip()
+        if scheme.lower() != "bearer" or not token:
+            raise ApiError(401, "缺少 Authorization: Bearer <token>")
+        return token, self.pool.acquire(token)
+
+    def _handle_login(self, query: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        body = self._read_json_body()
+        if body.get("encrypted_phone") and body.get("encrypted_password"):
+            phone, password = body["encrypted_phone"], body["encrypted_password"]
+            is_encrypted = True
+        elif body.get("phone") and body.get("password"):
+            phone, password = body["phone"], body["password"]
+            is_encrypted = False
+        else:
+            raise ApiError(400, "需要 phone/password 或 encrypted_phone/encrypted_password")
+
+        token, entry = self.pool.login(phone, password, is_encrypted)
+        return 200, {
+            "success": True,
+            "token": token,
+            "user_info": entry.client.user_info.to_dict(),
+        }
+
+    def _handle_logout(self, query: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        token, _ = self._authenticated_entry()
+        self.pool.logout(token)
+        return 200, {"success": True}
+
+    def _handle_sites(self, query: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        _, entry = self._authenticated_entry()
+        try:
+            longitude = float(query["longitude"])
+            latitude = float(query["latitude"])
+        except (KeyError, ValueError):
+            raise ApiError(400, "需要有效的 longitude 和 latitude 参数")
+
+        with entry.lock:
+            result = entry.client.get_attendance_sites(
+                longitude, latitude, display=False
+            )
+        return 200, result
+
+    def _handle_attendance_action(self, is_checkout: bool) -> Tuple[int, Dict[str, Any]]:
+        _, entry = self._authenticated_entry()
+        body = self._read_json_body()
+        site_data = body.get("site")
+        if isinstance(site_data, dict):
+            try:
+                site = AttendanceSite.from_server(site_data)
+            except KeyError as e:
+                raise ApiError(400, f"site 缺少字段: {e}")
+        else:
+            site = self.pool.resolve_site(body.get("address"), is_checkout)
+        offset_radius = body.get("offset_radius")
+        if offset_radius is not None:
+            try:
+                offset_radius = int(offset_radius)
+            except (TypeError, ValueError):
+                raise ApiError(400, "offset_radius 必须是米数")
+            if offset_radius < 0:
+                raise ApiError(400, "offset_radius 不能为负数")
+        try:
+            budget = float(body.get("deadline", ATTENDANCE_ACTION_DEADLINE))
+        except (TypeError, ValueError):
+            raise ApiError(400, "deadline 必须是秒数")
+
+        action_type = "签退" if is_checkout else "签到"
+        started_at = datetime.now()
+        with entry.lock, deadline_scope(budget):
+            action = entry.client.check_out if is_checkout else entry.client.check_in
+            result = action(offset_radius=offset_radius, site=site)
+            if result.get("success") and body.get("verify"):
+                record = self.pool.verifier.verify(
+                    entry.client, action_type, is_checkout, started_at
+                )
+                result["verified"] = record is not None
+                result["record"] = record.to_dict() if record else None
+        if result.get("queued"):
+            return 202, result
+        return (200 if result.get("success") else 502), result
+
+    def _handle_check_in(self, query: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        return self._handle_attendance_action(is_checkout=False)
+
+    def _handle_check_out(self, query: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        return self._handle_attendance_action(is_checkout=True)
+
+    def _handle_attendance(self, query: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        _, entry = self._authenticated_entry()
+        last_only = query.get("last_only", "").lower() in ("1", "true", "yes")
+
+        with entry.lock:
+            result = entry.client.get_monthly_attendance(
+                month=query.get("month"), last_only=last_only, display=False
+            )
+        if "error" in result:
+            raise ApiError(400, result["error"])
+        if last_only and result.get("dgpage"):
+            result = dict(result, dgpage=result["dgpage"][-1:])
+        return 200, result
+
+    def _handle_latest_attendance(
+        self, query: Dict[str, str]
+    ) -> Tuple[int, Dict[str, Any]]:
+        _, entry = self._authenticated_entry()
+        with entry.lock:
+            result = entry.client.get_latest_attendance(
+                month=query.get("month"), display=False
+            )
+        if not result["success"]:
+            raise ApiError(400, result["error"])
+        latest = result["latest"]
+        result["latest"] = latest.to_dict() if latest else None
+        result["new_records"] = [r.to_dict() for r in result["new_records"]]
+        result["changed_records"] = [r.to_dict() for r in result["changed_records"]]
+        return 200, result
+
+    def _handle_metrics(self, query: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        return 200, dict(
+            success=True, endpoints=endpoint_snapshots(), **get_metrics().snapshot()
+        )
+
+    ROUTES = {
+        ("POST", "/api/login"): _handle_login,
+        ("POST", "/api/logout"): _handle_logout,
+        ("GET", "/api/sites"): _handle_sites,
+        ("POST", "/api/check-in"): _handle_check_in,
+        ("POST", "/api/check-out"): _handle_check_out,
+        ("GET", "/api/attendance"): _handle_attendance,
+        ("GET", "/api/attendance/latest"): _handle_latest_attendance,
+        ("GET", "/api/metrics"): _handle_metrics,
+    }
+
+
+class InspurApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], pool: ClientPool):
+        super().__init__(address, InspurApiHandler)
+        self.pool = pool
+
+
+def serve(
+    host: str = API_SERVER_HOST,
+    port: int = API_SERVER_PORT,
+    idle_timeout: float = API_CLIENT_IDLE_TIMEOUT,
+    config_manager: Optional[ConfigManager] = None,
+) -> None:
+    pool = ClientPool(
+        config_manager or get_config_manager(), idle_timeout=idle_timeout
+    )
+    server = InspurApiServer((host, port), pool)
+    pool.start()
+    logger.info("本地 API 服务已启动: http://{}:{}", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.warning("API 服务被用户中断")
+    finally:
+        server.server_close()
+        pool.close()
+        logger.info("API 服务已关闭")
@@ -0,0 +1,224 @@
+import contextvars
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional
+
+from inspur.attendance_warehouse import AttendanceWarehouse, get_warehouse
+from inspur.config_manager import ConfigManager
+from inspur.deadline import deadline_scope
+from inspur.login_manager import LoginManager
+from inspur.models import AttendanceRecord
+from utils.constants import (REPORT_MAX_WORKERS, REPORT_USER_DEADLINE,
+                             WAREHOUSE_ENABLED)
+from utils.logger import get_logger
+from utils.table_renderer import print_table
+from utils.tracing import traced
+
+logger = get_logger(__name__)
+
+
+class UserReport:
+    __slots__ = ("user_name", "encrypted_phone", "month", "records", "error", "elapsed")
+
+    def __init__(
+        self,
+        user_name: str,
+        encrypted_phone: str,
+        month: str,
+        records: Optional[List[AttendanceRecord]] = None,
+        error: Optional[str] = None,
+        elapsed: float = 0.0,
+    ):
+        self.user_name = user_name
+        self.encrypted_phone = encrypted_phone
+        self.month = month
+        self.records = records or []
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+    @property
+    def signed_in_days(self) -> int:
+        return sum(1 for record in self.records if record.signed_in)
+
+    @property
+    def signed_out_days(self) -> int:
+        return sum(1 for record in self.records if record.signed_out)
+
+    def __repr__(self) -> str:
+        return (
+            f"UserReport(user_name={self.user_name!r}, month={self.month!r}, "
+            f"records={len(self.records)}, error={self.error!r})"
+        )
+
+
+class AttendanceReporter:
+    def __init__(
+        self,
+        config_manager: ConfigManager,
+        max_workers: int = REPORT_MAX_WORKERS,
+        user_deadline: float = REPORT_USER_DEADLINE,
+        warehouse: Optional[AttendanceWarehouse] = None,
+    ):
+        self.config_manager = config_manager
+        self.login_manager = LoginManager(config_manager)
+        self.max_workers = max_workers
+        self.user_deadline = user_deadline
+        if warehouse is None and WAREHOUSE_ENABLED:
+            warehouse = get_warehouse()
+        self.warehouse = warehouse
+
+    @traced("report.collect")
+    def collect(
+        self, month: Optional[str] = None, local: bool = False
+    ) -> List[UserReport]:
+        month = month or datetime.now().strftime("%Y-%m")
+        users = self.config_manager.get_all_users()
+        if not users:
+            logger.warning("没有保存的用户")
+            return []
+
+        logger.info("正在查询 {} 个用户的 {} 考勤记录...", len(users), month)
+        started = time.perf_counter()
+        workers = max(1, min(self.max_workers, len(users)))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="inspur-report"
+        ) as executor:
+            # 每个任务在调用方上下文的副本中运行，工作线程中的 span 挂在本次汇总下
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self._collect_user,
+                    encrypted_phone,
+                    user_data["password"],
+                    user_data["username"],
+                    month,
+                    local,
+                )
+                for encrypted_phone, user_data in users.items()
+            ]
+            reports = [future.result() for future in futures]
+
+        failed = sum(1 for report in reports if not report.success)
+        logger.info(
+            "查询完成，用时 {:.2f} 秒，成功 {} 个，失败 {} 个",
+            time.perf_counter() - started,
+            len(reports) - failed,
+            failed,
+        )
+        return reports
+
+    def _load_local(
+        self, encrypted_phone: str, month: str, local: bool
+    ) -> Optional[List[AttendanceRecord]]:
+        if self.warehouse is None:
+            return None
+        user_id = self.warehouse.find_user_id(encrypted_phone)
+        if user_id is None:
+            return None
+        # 已结束的月份本地数据不会再变化，无需登录查询
+        if not local and not self.warehouse.is_closed(user_id, month):
+            return None
+        stored = self.warehouse.load_month(user_id, month)
+        return stored[0] if stored is not None else None
+
+    def _collect_user(
+        self,
+        encrypted_phone: str,
+        encrypted_password: str,
+        user_name: str,
+        month: str,
+        local: bool = False,
+    ) -> UserReport:
+        started = time.perf_counter()
+        report = UserReport(user_name, encrypted_phone, month)
+        client = None
+        try:
+            records = self._load_local(encrypted_phone, month, local)
+            if records is not None:
+                report.records = records
+                return report
+            if local:
+                report.error = "本地库中没有该月记录"
+                return report
+
+            with deadline_scope(self.user_deadline):
+                login_result = self.login_manager.login_with_credentials(
+                    encrypted_phone, encrypted_password, is_encrypted=True
+                )
+                if not login_result["success"]:
+                    report.error = login_result.get("error") or "登录失败"
+                    return report
+
+                client = login_result["logged_in_inspur"]
+                if self.warehouse is not None and client.user_info:
+                    self.warehouse.link_user(
+                        client.user_info.user_id,
+                        client.user_info.user_name,
+                        encrypted_phone,
+                    )
+                report.records = client.fetch_monthly_attendance(month).records
+        except Exception as e:
+            report.error = str(e)
+        finally:
+            if client is not None:
+                client.close()
+            report.elapsed = time.perf_counter() - started
+            if report.error:
+                logger.warning("查询 {} 的考勤记录失败: {}", user_name, report.error)
+        return report
+
+    def display(self, reports: List[UserReport]) -> None:
+        rows = []
+        for report in reports:
+            if not report.success:
+                rows.append((report.user_name, "", "", "", f"查询失败: {report.error}"))
+                continue
+
+            latest = report.records[-1] if report.records else None
+            latest_text = (
+                f"{latest.sign_time} {latest.sign_in_time or '-'}/"
+                f"{latest.sign_out_time or '-'}"
+                if latest
+                else "无"
+            )
+            rows.append(
+                (
+                    report.user_name,
+                    len(report.records),
+                    report.signed_in_days,
+                    report.signed_out_days,
+                    latest_text,
+                )
+            )
+        print_table(
+            ("用户", "记录天数", "签到天数", "签退天数", "最新记录"), rows, "<>>><"
+        )
+
+    def export_csv(self, reports: List[UserReport], path: str) -> None:
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["用户", "月份", "日期", "签到时间", "签退时间", "错误"])
+            for report in reports:
+                if not report.success:
+                    writer.writerow(
+                        [report.user_name, report.month, "", "", "", report.error]
+                    )
+                    continue
+                for record in report.records:
+                    writer.writerow(
+                        [
+                            report.user_name,
+                            report.month,
+                            record.sign_time,
+                            record.sign_in_time if record.signed_in else "",
+                            record.sign_out_time if record.signed_out else "",
+                            "",
+                        ]
+                    )
+        logger.info("考勤报表已导出到 {}", path)
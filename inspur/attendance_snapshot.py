@@ -0,0 +1,124 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from inspur.models import AttendanceRecord
+from utils import json_codec
+from utils.constants import SNAPSHOT_MAX_ENTRIES
+
+
+class MonthSnapshot:
+    __slots__ = ("records", "extra", "content_hash", "etag", "last_modified")
+
+    def __init__(
+        self,
+        records: List[AttendanceRecord],
+        extra: Dict[str, Any],
+        content_hash: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        self.records = records
+        self.extra = extra
+        self.content_hash = content_hash
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def latest(self) -> Optional[AttendanceRecord]:
+        return self.records[-1] if self.records else None
+
+    def to_payload(self) -> Dict[str, Any]:
+        payload = dict(self.extra)
+        payload["dgpage"] = [record.to_dict() for record in self.records]
+        return payload
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class AttendanceSnapshotStore:
+    def __init__(self, max_entries: int = SNAPSHOT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._snapshots: "OrderedDict[Tuple[str, str], MonthSnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, month: str) -> Optional[MonthSnapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get((user_id, month))
+            if snapshot is not None:
+                self._snapshots.move_to_end((user_id, month))
+            return snapshot
+
+    def apply_response(
+        self, user_id: str, month: str, response: requests.Response
+    ) -> Tuple[MonthSnapshot, List[AttendanceRecord], List[AttendanceRecord]]:
+        previous = self.get(user_id, month)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        if response.status_code == 304:
+            if previous is None:
+                raise requests.exceptions.RequestException("考勤记录缓存已失效")
+            return previous, [], []
+
+        content_hash = hashlib.sha1(response.content).hexdigest()
+        if previous is not None and previous.content_hash == content_hash:
+            previous.etag = etag or previous.etag
+            previous.last_modified = last_modified or previous.last_modified
+            return previous, [], []
+
+        payload = json_codec.decode_response(response)
+        records = [
+            AttendanceRecord.from_server(record)
+            for record in payload.pop("dgpage", None) or []
+        ]
+        new_records, changed_records = self._merge_records(previous, records)
+        snapshot = MonthSnapshot(records, payload, content_hash, etag, last_modified)
+
+        with self._lock:
+            self._snapshots[(user_id, month)] = snapshot
+            self._snapshots.move_to_end((user_id, month))
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+
+        return snapshot, new_records, changed_records
+
+    def _merge_records(
+        self, previous: Optional[MonthSnapshot], records: List[AttendanceRecord]
+    ) -> Tuple[List[AttendanceRecord], List[AttendanceRecord]]:
+        if previous is None:
+            return list(records), []
+
+        known = {record.sign_time: record for record in previous.records}
+        new_records = []
+        changed_records = []
+        for index, record in enumerate(records):
+            old_record = known.get(record.sign_time)
+            if old_record is None:
+                new_records.append(record)
+            elif old_record == record:
+                # 复用上一次解析的记录对象，未变化的记录不重复占用内存
+                records[index] = old_record
+            else:
+                changed_records.append(record)
+        return new_records, changed_records
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+
+
+_default_store = AttendanceSnapshotStore()
+
+
+def get_snapshot_store() -> AttendanceSnapshotStore:
+    return _default_store
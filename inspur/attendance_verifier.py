@@ -0,0 +1,106 @@
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional
+
+import requests
+
+from inspur.deadline import current_deadline
+from inspur.inspur_client import InspurClient
+from inspur.models import AttendanceRecord, find_confirmed_record
+from utils.constants import (VERIFY_CLOCK_SKEW_SECONDS, VERIFY_INITIAL_DELAY,
+                             VERIFY_MAX_ATTEMPTS)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AttendanceVerifier:
+    def __init__(
+        self,
+        max_attempts: int = VERIFY_MAX_ATTEMPTS,
+        initial_delay: float = VERIFY_INITIAL_DELAY,
+    ):
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="inspur-verify"
+        )
+        self._stop = threading.Event()
+
+    def submit(
+        self,
+        client: InspurClient,
+        action_type: str,
+        is_checkout: bool,
+        started_at: Optional[datetime] = None,
+    ) -> Future:
+        started_at = started_at or datetime.now()
+        logger.info("正在后台确认{}记录...", action_type)
+        context = contextvars.copy_context()
+        return self._executor.submit(
+            context.run, self.verify, client, action_type, is_checkout, started_at
+        )
+
+    def verify(
+        self,
+        client: InspurClient,
+        action_type: str,
+        is_checkout: bool,
+        started_at: datetime,
+    ) -> Optional[AttendanceRecord]:
+        month = started_at.strftime("%Y-%m")
+        delay = self.initial_delay
+
+        for attempt in range(self.max_attempts):
+            if self._stop.is_set():
+                return None
+            try:
+                snapshot, _, _ = client.refresh_attendance_snapshot(
+                    month, revalidate=True
+                )
+                record = self._find_confirmed_record(
+                    snapshot.records, is_checkout, started_at
+                )
+                if record:
+                    logger.info("✓ {}记录已确认", action_type)
+                    # 确认用的快照同时作为本月预取结果，之后的查询无需再请求
+                    prefetched: Future = Future()
+                    prefetched.set_result(snapshot)
+                    client.set_prefetched_attendance(month, prefetched)
+                    return record
+            except requests.exceptions.RequestException as e:
+                logger.warning("确认{}记录失败: {}", action_type, e)
+            except Exception as e:
+                logger.error("确认{}记录出错: {}", action_type, e)
+                return None
+
+            deadline = current_deadline()
+            if deadline is not None and deadline.remaining() <= delay:
+                logger.warning("确认{}记录超出时间预算", action_type)
+                return None
+
+            if attempt < self.max_attempts - 1:
+                logger.debug("{}记录尚未出现，{} 秒后重试", action_type, delay)
+                if self._stop.wait(delay):
+                    return None
+                delay *= 2
+
+        logger.warning("未能确认{}记录，请稍后手动查询", action_type)
+        return None
+
+    def _find_confirmed_record(
+        self,
+        records: List[AttendanceRecord],
+        is_checkout: bool,
+        started_at: datetime,
+    ) -> Optional[AttendanceRecord]:
+        return find_confirmed_record(
+            records, is_checkout, started_at, VERIFY_CLOCK_SKEW_SECONDS
+        )
+
+    def shutdown(self, wait: bool = False) -> None:
+        # 排队中和退避等待中的确认任务在下一次检查时直接结束
+        self._stop.set()
+        self._executor.shutdown(wait=wait)
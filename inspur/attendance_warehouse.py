@@ -0,0 +1,269 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from inspur.attendance_snapshot import MonthSnapshot
+from inspur.models import AttendanceRecord
+from utils.constants import WAREHOUSE_CLOSE_GRACE_DAYS, WAREHOUSE_PATH
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 主键 (user_id, date) 同时作为按用户、日期范围查询的聚簇索引
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attendance_records (
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    sign_in_time TEXT NOT NULL DEFAULT '',
+    sign_out_time TEXT NOT NULL DEFAULT '',
+    extra TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (user_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    user_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    extra TEXT NOT NULL,
+    record_count INTEGER NOT NULL,
+    synced_at REAL NOT NULL,
+    changed_at REAL NOT NULL,
+    PRIMARY KEY (user_id, month)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    user_name TEXT NOT NULL,
+    encrypted_phone TEXT
+);
+CREATE INDEX IF NOT EXISTS users_phone ON users (encrypted_phone);
+"""
+
+
+def month_range(month: str) -> Tuple[str, str]:
+    year, month_number = (int(part) for part in month.split("-"))
+    if month_number == 12:
+        year, month_number = year + 1, 1
+    else:
+        month_number += 1
+    return f"{month}-01", f"{year:04d}-{month_number:02d}-01"
+
+
+def months_between(start_month: str, end_month: str) -> List[str]:
+    months = []
+    month = start_month
+    while month <= end_month:
+        months.append(month)
+        month = month_range(month)[1][:7]
+    return months
+
+
+class AttendanceWarehouse:
+    def __init__(
+        self,
+        path: str = WAREHOUSE_PATH,
+        close_grace_days: float = WAREHOUSE_CLOSE_GRACE_DAYS,
+    ):
+        self.path = path
+        self.close_grace_days = close_grace_days
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _closed_after(self, month: str) -> float:
+        month_end = datetime.strptime(month_range(month)[1], "%Y-%m-%d")
+        return (month_end + timedelta(days=self.close_grace_days)).timestamp()
+
+    def is_closed(self, user_id: str, month: str) -> bool:
+        # 月份结束并过了宽限期之后同步过一次，之后不会再变化，无需重新拉取
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT synced_at FROM sync_state WHERE user_id = ? AND month = ?",
+                    (user_id, month),
+                )
+                .fetchone()
+            )
+        return row is not None and row["synced_at"] >= self._closed_after(month)
+
+    def store_month(
+        self,
+        user_id: str,
+        month: str,
+        snapshot: MonthSnapshot,
+        user_name: Optional[str] = None,
+    ) -> bool:
+        now = time.time()
+        start, end = month_range(month)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                if user_name:
+                    conn.execute(
+                        "INSERT INTO users (user_id, user_name) VALUES (?, ?) "
+                        "ON CONFLICT (user_id) DO UPDATE SET user_name = excluded.user_name",
+                        (user_id, user_name),
+                    )
+
+                row = conn.execute(
+                    "SELECT content_hash FROM sync_state WHERE user_id = ? AND month = ?",
+                    (user_id, month),
+                ).fetchone()
+                if row is not None and row["content_hash"] == snapshot.content_hash:
+                    conn.execute(
+                        "UPDATE sync_state SET synced_at = ? WHERE user_id = ? AND month = ?",
+                        (now, user_id, month),
+                    )
+                    return False
+
+                dates = [record.sign_time for record in snapshot.records]
+                conn.executemany(
+                    "INSERT INTO attendance_records (user_id, date, sign_in_time, "
+                    "sign_out_time, extra, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (user_id, date) DO UPDATE SET "
+                    "sign_in_time = excluded.sign_in_time, "
+                    "sign_out_time = excluded.sign_out_time, "
+                    "extra = excluded.extra, updated_at = excluded.updated_at "
+                    "WHERE sign_in_time IS NOT excluded.sign_in_time "
+                    "OR sign_out_time IS NOT excluded.sign_out_time "
+                    "OR extra IS NOT excluded.extra",
+                    [
+                        (
+                            user_id,
+                            record.sign_time,
+                            record.sign_in_time,
+                            record.sign_out_time,
+                            json.dumps(record.extra, ensure_ascii=False)
+                            if record.extra
+                            else None,
+                            now,
+                        )
+                        for record in snapshot.records
+                    ],
+                )
+                # 服务端已删除的记录同步删除
+                placeholders = ",".join("?" * len(dates))
+                conn.execute(
+                    "DELETE FROM attendance_records WHERE user_id = ? "
+                    "AND date >= ? AND date < ?"
+                    + (f" AND date NOT IN ({placeholders})" if dates else ""),
+                    [user_id, start, end, *dates],
+                )
+                conn.execute(
+                    "INSERT INTO sync_state (user_id, month, content_hash, extra, "
+                    "record_count, synced_at, changed_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (user_id, month) DO UPDATE SET "
+                    "content_hash = excluded.content_hash, extra = excluded.extra, "
+                    "record_count = excluded.record_count, "
+                    "synced_at = excluded.synced_at, changed_at = excluded.changed_at",
+                    (
+                        user_id,
+                        month,
+                        snapshot.content_hash,
+                        json.dumps(snapshot.extra, ensure_ascii=False),
+                        len(snapshot.records),
+                        now,
+                        now,
+                    ),
+                )
+        logger.debug("考勤记录已写入本地库: {} {} 条", month, len(snapshot.records))
+        return True
+
+    def link_user(self, user_id: str, user_name: str, encrypted_phone: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO users (user_id, user_name, encrypted_phone) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET user_name = excluded.user_name, "
+                "encrypted_phone = excluded.encrypted_phone",
+                (user_id, user_name, encrypted_phone),
+            )
+
+    def find_user_id(self, encrypted_phone: str) -> Optional[str]:
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT user_id FROM users WHERE encrypted_phone = ?",
+                    (encrypted_phone,),
+                )
+                .fetchone()
+            )
+        return row["user_id"] if row else None
+
+    def load_month(
+        self, user_id: str, month: str
+    ) -> Optional[Tuple[List[AttendanceRecord], Dict[str, Any]]]:
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT extra FROM sync_state WHERE user_id = ? AND month = ?",
+                    (user_id, month),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        start, end = month_range(month)
+        return self.records(user_id, start, end), json.loads(row["extra"])
+
+    def records(
+        self, user_id: str, start_date: str, end_date: str
+    ) -> List[AttendanceRecord]:
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    "SELECT date, sign_in_time, sign_out_time, extra "
+                    "FROM attendance_records "
+                    "WHERE user_id = ? AND date >= ? AND date < ? ORDER BY date",
+                    (user_id, start_date, end_date),
+                )
+                .fetchall()
+            )
+        return [
+            AttendanceRecord(
+                row["date"],
+                row["sign_in_time"],
+                row["sign_out_time"],
+                json.loads(row["extra"]) if row["extra"] else None,
+            )
+            for row in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_default_warehouse: Optional[AttendanceWarehouse] = None
+_default_warehouse_lock = threading.Lock()
+
+
+def get_warehouse() -> AttendanceWarehouse:
+    global _default_warehouse
+    with _default_warehouse_lock:
+        if _default_warehouse is None:
+            _default_warehouse = AttendanceWarehouse()
+        return _default_warehouse
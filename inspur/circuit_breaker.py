@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+import requests
+
+from utils.constants import (CIRCUIT_FAILURE_RATE_THRESHOLD,
+                             CIRCUIT_HALF_OPEN_MAX_CALLS, CIRCUIT_MINIMUM_CALLS,
+                             CIRCUIT_OPEN_SECONDS, CIRCUIT_WINDOW_SECONDS)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"考勤服务暂不可用（{name}），请 {retry_after:.0f} 秒后重试")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def is_backend_failure(error: requests.exceptions.RequestException) -> bool:
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is None or response.status_code >= 500
+    return isinstance(
+        error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    )
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = CIRCUIT_FAILURE_RATE_THRESHOLD,
+        minimum_calls: int = CIRCUIT_MINIMUM_CALLS,
+        window_seconds: float = CIRCUIT_WINDOW_SECONDS,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+        half_open_max_calls: int = CIRCUIT_HALF_OPEN_MAX_CALLS,
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._state = STATE_CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if (
+                self._state == STATE_OPEN
+                and time.monotonic() - self._opened_at >= self.open_seconds
+            ):
+                return STATE_HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._state == STATE_OPEN:
+                remaining = self.open_seconds - (now - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(self.name, remaining)
+                self._state = STATE_HALF_OPEN
+                self._probes_in_flight = 0
+                logger.info("熔断器半开，发送探测请求: {}", self.name)
+
+            if self._state == STATE_HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_max_calls:
+                    raise CircuitOpenError(self.name, self.open_seconds)
+                self._probes_in_flight += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._state = STATE_CLOSED
+                self._outcomes.clear()
+                self._probes_in_flight = 0
+                logger.info("熔断器已恢复: {}", self.name)
+                return
+            self._record(True)
+
+    def release(self) -> None:
+        # 结果不能说明考勤服务是否健康（超出时间预算、非网络异常等），只归还探测名额
+        with self._lock:
+            if self._state == STATE_HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._open()
+                return
+            if self._state == STATE_OPEN:
+                return
+
+            self._record(False)
+            calls = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if (
+                calls >= self.minimum_calls
+                and failures / calls >= self.failure_rate_threshold
+            ):
+                self._open()
+
+    def _record(self, ok: bool) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self) -> None:
+        self._state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        self._outcomes.clear()
+        logger.warning(
+            "考勤服务连续失败，熔断 {} 秒: {}", self.open_seconds, self.name
+        )
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(base_url: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(base_url)
+        if breaker is None:
+            breaker = CircuitBreaker(base_url)
+            _breakers[base_url] = breaker
+        return breaker
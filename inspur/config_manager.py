@@ -1,21 +1,76 @@
+import atexit
+import copy
 import os
 import shutil
-from typing import Any, Dict, Optional, Tuple
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 import yaml
 
-from utils.constants import DEFAULT_BASE_URL
+from utils.constants import (CONFIG_FLUSH_DELAY, CONFIG_WRITE_BEHIND,
+                             DEFAULT_BASE_URL, HTTP_CACHE_ENABLED)
 from utils.logger import get_logger
+from utils.tracing import current_span, traced
 
 logger = get_logger(__name__)
 
 
 class ConfigManager:
-    def __init__(self, config_file: str = "conf/config.yml"):
+    def __init__(
+        self,
+        config_file: str = "conf/config.yml",
+        write_behind: bool = False,
+        flush_delay: float = CONFIG_FLUSH_DELAY,
+    ):
         self.config_file = config_file
+        self.flush_delay = flush_delay
+        self.write_behind = False
         self._cache: Optional[Dict[str, Any]] = None
+        self._data_cache: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = None
+        self._lock = threading.RLock()
+        # 延迟写入：修改先保存在内存文档中，由后台线程去抖后写盘
+        self._pending: Optional[Dict[str, Any]] = None
+        self._generation = 0
+        self._dirty_at = 0.0
+        self._flush_cond = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._flush_thread: Optional[threading.Thread] = None
+        self._atexit_registered = False
+        if write_behind:
+            self.set_write_behind(True)
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
 
+    @traced("config.load")
     def _load_data(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._pending is not None:
+                current_span().set_attribute("config.cache_hit", True)
+                return copy.deepcopy(self._pending)
+
+            signature = self._file_signature()
+            cache_hit = (
+                self._data_cache is not None and self._data_cache[0] == signature
+            )
+            current_span().set_attribute("config.cache_hit", cache_hit)
+            if cache_hit:
+                return copy.deepcopy(self._data_cache[1])
+
+            data = self._read_data()
+            signature = self._file_signature()
+            if signature is not None:
+                self._data_cache = (signature, data)
+                return copy.deepcopy(data)
+            return data
+
+    def _read_data(self) -> Dict[str, Any]:
         if not os.path.exists(self.config_file):
             template_file = os.path.join(
                 os.path.dirname(self.config_file), "config.example.yml"
@@ -36,15 +91,106 @@ class ConfigManager:
             logger.error("加载配置文件失败: {}", e)
             return {}
 
+    @traced("config.save")
     def _save_data(self, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cache = None
+            if self.write_behind:
+                self._pending = data
+                self._generation += 1
+                self._dirty_at = time.monotonic()
+                self._flush_cond.notify_all()
+                return
+
+            try:
+                self._write_file(data)
+            except Exception as e:
+                logger.error("保存配置文件失败: {}", e)
+                raise
+
+    def _write_file(self, data: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self.config_file) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            prefix=".config-", suffix=".tmp", dir=directory
+        )
         try:
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, "w", encoding="utf-8") as f:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
                 yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
-            self._cache = None
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(self.config_file):
+                shutil.copymode(self.config_file, temp_path)
+            # 原子替换，写入中途退出也不会留下半个配置文件
+            os.replace(temp_path, self.config_file)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        signature = self._file_signature()
+        with self._lock:
+            self._data_cache = (signature, data) if signature is not None else None
+
+    def set_write_behind(self, enabled: bool) -> None:
+        with self._lock:
+            self.write_behind = enabled
+            self._flush_cond.notify_all()
+            if enabled and self._flush_thread is None:
+                self._flush_thread = threading.Thread(
+                    target=self._flush_loop, name="inspur-config-writer", daemon=True
+                )
+                self._flush_thread.start()
+                if not self._atexit_registered:
+                    atexit.register(self.close)
+                    self._atexit_registered = True
+        if not enabled:
+            self.close()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._flush_cond:
+                while self.write_behind:
+                    if self._pending is None:
+                        self._flush_cond.wait()
+                        continue
+                    remaining = self._dirty_at + self.flush_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._flush_cond.wait(remaining)
+                if not self.write_behind:
+                    return
+
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("后台保存配置文件失败: {}", e)
+                with self._lock:
+                    self._dirty_at = time.monotonic()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                data, generation = self._pending, self._generation
+            if data is None:
+                return
+
+            self._write_file(data)
+            with self._lock:
+                if self._generation == generation:
+                    self._pending = None
+
+    def close(self) -> None:
+        with self._lock:
+            self.write_behind = False
+            thread, self._flush_thread = self._flush_thread, None
+            self._flush_cond.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        try:
+            self.flush()
         except Exception as e:
             logger.error("保存配置文件失败: {}", e)
-            raise
 
     def _build_config_object(self, data: Dict[str, Any]) -> Dict[str, Any]:
         user_config = data["user_config"]
@@ -53,6 +199,9 @@ class ConfigManager:
         attendance_data = app_data["attendance_data"]
 
         longitude, latitude = user_config["default_location"].split(",")
+        base_urls = app_settings.get("base_urls") or [DEFAULT_BASE_URL]
+        if isinstance(base_urls, str):
+            base_urls = [base_urls]
 
         return {
             "default_password": user_config["default_password"],
@@ -60,20 +209,30 @@ class ConfigManager:
             "default_longitude": float(longitude),
             "default_latitude": float(latitude),
             "attendance_sites": attendance_data["sites"],
-            "base_url": DEFAULT_BASE_URL,
+            "base_url": base_urls[0],
+            "base_urls": base_urls,
             "auto_query_after_check": app_settings["auto_query_after_check"],
             "random_radius_meters": app_settings["random_radius_meters"],
             "log_level": app_settings["log_level"],
+            "rate_limit": app_settings.get("rate_limit") or {},
+            "http_cache": bool(app_settings.get("http_cache", HTTP_CACHE_ENABLED)),
         }
 
     def load_config(self) -> Dict[str, Any]:
-        if self._cache is not None:
-            return self._cache
+        with self._lock:
+            if self._cache is not None:
+                return self._cache
 
-        data = self._load_data()
-        config = self._build_config_object(data)
-        self._cache = config
-        return config
+            data = self._load_data()
+            config = self._build_config_object(data)
+            self._cache = config
+            return config
+
+    def reload(self) -> Dict[str, Any]:
+        # 延迟写入模式下内存中尚未写盘的修改优先
+        with self._lock:
+            self._cache = None
+            return self.load_config()
 
     def _ensure_section_exists(self, data: Dict[str, Any], section: str) -> None:
         if section not in data:
@@ -139,6 +298,41 @@ class ConfigManager:
             logger.error("保存用户凭据失败: {}", e)
             raise
 
+    def add_users(self, users: Iterable[Tuple[str, str, str]]) -> Tuple[int, int]:
+        try:
+            data = self._load_data()
+            self._ensure_section_exists(data, "app_data")
+            saved_users = data["app_data"].setdefault("saved_users", [])
+            by_phone = {user["phone_hash"]: user for user in saved_users}
+            next_id = max([user["id"] for user in saved_users], default=0) + 1
+
+            added = updated = 0
+            for encrypted_phone, encrypted_password, display_name in users:
+                user = by_phone.get(encrypted_phone)
+                if user is not None:
+                    user["name"] = display_name
+                    user["password_hash"] = encrypted_password
+                    updated += 1
+                    continue
+
+                user = {
+                    "id": next_id,
+                    "name": display_name,
+                    "phone_hash": encrypted_phone,
+                    "password_hash": encrypted_password,
+                }
+                saved_users.append(user)
+                by_phone[encrypted_phone] = user
+                next_id += 1
+                added += 1
+
+            self._save_data(data)
+            logger.info("用户凭据已保存: 新增 {} 个，更新 {} 个", added, updated)
+            return added, updated
+        except Exception as e:
+            logger.error("批量保存用户凭据失败: {}", e)
+            raise
+
     def add_user_and_update_current(
         self, encrypted_phone: str, encrypted_password: str, display_name: str
     ) -> None:
@@ -186,6 +380,46 @@ class ConfigManager:
             logger.error("保存考勤点信息失败: {}", e)
             raise
 
+    def merge_attendance_sites(
+        self, attendance_sites: Dict[str, Any]
+    ) -> Tuple[int, int]:
+        try:
+            data = self._load_data()
+            attendance_data = data["app_data"]["attendance_data"]
+            stored = attendance_data.get("sites") or {}
+            address_by_id = {
+                str(site["id"]): address for address, site in stored.items()
+            }
+
+            added = updated = 0
+            for address, site in attendance_sites.items():
+                site_id = str(site["id"])
+                old_address = address_by_id.get(site_id)
+                if old_address is not None and old_address != address:
+                    # 同一考勤点地址名称变化时替换旧条目，并更新已选中的考勤点
+                    stored.pop(old_address, None)
+                    for key in ("checkin_site_address", "checkout_site_address"):
+                        if attendance_data.get(key) == old_address:
+                            attendance_data[key] = address
+
+                previous = stored.get(address)
+                if previous == site:
+                    continue
+                if previous is None and old_address is None:
+                    added += 1
+                else:
+                    updated += 1
+                stored[address] = site
+                address_by_id[site_id] = address
+
+            if added or updated:
+                attendance_data["sites"] = stored
+                self._save_data(data)
+            return added, updated
+        except Exception as e:
+            logger.error("合并考勤点信息失败: {}", e)
+            raise
+
     def save_checkin_site(self, site_address: str) -> None:
         try:
             data = self._load_data()
@@ -265,3 +499,17 @@ class ConfigManager:
         except Exception as e:
             logger.error("获取考勤客户端UUID失败: {}", e)
             return None
+
+
+_default_managers: Dict[str, ConfigManager] = {}
+_default_managers_lock = threading.Lock()
+
+
+def get_config_manager(config_file: str = "conf/config.yml") -> ConfigManager:
+    # 同一配置文件共享一个实例，延迟写入时所有修改都在同一份内存文档上
+    with _default_managers_lock:
+        manager = _default_managers.get(config_file)
+        if manager is None:
+            manager = ConfigManager(config_file, write_behind=CONFIG_WRITE_BEHIND)
+            _default_managers[config_file] = manager
+        return manager
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from inspur.config_manager import ConfigManager
+from utils.constants import CONFIG_WATCH_DEBOUNCE, CONFIG_WATCH_POLL_INTERVAL
+from utils.logger import get_logger
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+logger = get_logger(__name__)
+
+ConfigChanges = Dict[str, Tuple[Any, Any]]
+ConfigSubscriber = Callable[[ConfigChanges], None]
+
+
+def diff_config(old: Dict[str, Any], new: Dict[str, Any]) -> ConfigChanges:
+    return {
+        key: (old.get(key), new.get(key))
+        for key in old.keys() | new.keys()
+        if old.get(key) != new.get(key)
+    }
+
+
+class ConfigWatcher:
+    def __init__(
+        self,
+        config_manager: ConfigManager,
+        debounce: float = CONFIG_WATCH_DEBOUNCE,
+        poll_interval: float = CONFIG_WATCH_POLL_INTERVAL,
+        use_inotify: bool = True,
+    ):
+        self.config_manager = config_manager
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and inotify_simple is not None
+        self._subscribers: List[ConfigSubscriber] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._config: Optional[Dict[str, Any]] = None
+        self._content_hash: Optional[str] = None
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def subscribe(self, callback: ConfigSubscriber) -> None:
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: ConfigSubscriber) -> None:
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._config = self.config_manager.load_config()
+        self._signature = self.config_manager._file_signature()
+        self._content_hash = self._read_hash()
+        self._stop.clear()
+        target = self._watch_inotify if self.use_inotify else self._watch_polling
+        self._thread = threading.Thread(
+            target=target, name="inspur-config-watcher", daemon=True
+        )
+        self._thread.start()
+        logger.debug("配置文件监听已启动（{}）", "inotify" if self.use_inotify else "轮询")
+
+    def _read_hash(self) -> Optional[str]:
+        try:
+            with open(self.config_manager.config_file, "rb") as f:
+                return hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def _watch_polling(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            if self.config_manager._file_signature() == self._signature:
+                continue
+            self._wait_until_quiet(self.config_manager._file_signature)
+            self.check()
+
+    def _watch_inotify(self) -> None:
+        path = os.path.abspath(self.config_manager.config_file)
+        directory, filename = os.path.split(path)
+        flags = inotify_simple.flags
+        mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.DELETE
+        # 监听所在目录，编辑器通过重命名替换文件时也能收到事件
+        with inotify_simple.INotify() as inotify:
+            inotify.add_watch(directory, mask)
+            while not self._stop.is_set():
+                events = inotify.read(timeout=int(self.poll_interval * 1000))
+                if not any(event.name == filename for event in events):
+                    continue
+                # 去抖：直到一段时间内没有新事件再检查
+                while not self._stop.is_set():
+                    events = inotify.read(timeout=int(self.debounce * 1000))
+                    if not any(event.name == filename for event in events):
+                        break
+                self.check()
+
+    def _wait_until_quiet(self, probe: Callable[[], Any]) -> None:
+        last = probe()
+        while not self._stop.wait(self.debounce):
+            current = probe()
+            if current == last:
+                return
+            last = current
+
+    def check(self) -> ConfigChanges:
+        signature = self.config_manager._file_signature()
+        content_hash = self._read_hash()
+        self._signature = signature
+        if content_hash is None or content_hash == self._content_hash:
+            return {}
+        self._content_hash = content_hash
+
+        try:
+            config = self.config_manager.reload()
+        except Exception as e:
+            logger.warning("重新加载配置失败: {}", e)
+            return {}
+
+        old_config, self._config = self._config or {}, config
+        changes = diff_config(old_config, config)
+        if not changes:
+            return {}
+
+        logger.info("配置文件已更新: {}", ", ".join(sorted(changes)))
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(changes)
+            except Exception as e:
+                logger.warning("处理配置变更失败: {}", e)
+        return changes
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout if timeout is not None else self.poll_interval + 1)
@@ -0,0 +1,72 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Tuple
+
+import requests
+
+from utils.constants import CONNECT_TIMEOUT, REQUEST_TIMEOUT
+
+
+class DeadlineExceededError(requests.exceptions.Timeout):
+    pass
+
+
+class Deadline:
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, action: str = "操作") -> None:
+        if self.expired:
+            raise DeadlineExceededError(
+                f"{action}超出时间预算（{self.budget_seconds:g} 秒）"
+            )
+
+    def request_timeout(
+        self, connect: float = CONNECT_TIMEOUT, read: float = REQUEST_TIMEOUT
+    ) -> Tuple[float, float]:
+        self.check("请求")
+        remaining = self.remaining()
+        return min(connect, remaining), min(read, remaining)
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar(
+    "inspur_deadline", default=None
+)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def request_timeout() -> Tuple[float, float]:
+    deadline = current_deadline()
+    if deadline is None:
+        return CONNECT_TIMEOUT, REQUEST_TIMEOUT
+    return deadline.request_timeout()
+
+
+@contextmanager
+def deadline_scope(budget_seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    parent = current_deadline()
+    if budget_seconds is None:
+        yield parent
+        return
+
+    deadline = Deadline(budget_seconds)
+    if parent is not None and parent.expires_at < deadline.expires_at:
+        deadline = parent
+
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
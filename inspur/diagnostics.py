@@ -0,0 +1,250 @@
+import http.client
+import socket
+import ssl
+import statistics
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from inspur.inspur_client import (ATTENDANCE_RECORDS_ENDPOINT,
+                                  ATTENDANCE_SITES_ENDPOINT, LOGIN_ENDPOINT)
+from utils.constants import (CONNECT_TIMEOUT, DOCTOR_KEEPALIVE_REQUESTS,
+                             DOCTOR_SAMPLES, REQUEST_TIMEOUT)
+from utils.logger import get_logger
+from utils.table_renderer import print_table
+
+logger = get_logger(__name__)
+
+PROBE_PATHS = (
+    ("首页", "/"),
+    ("登录", LOGIN_ENDPOINT),
+    ("考勤点", ATTENDANCE_SITES_ENDPOINT),
+    ("考勤记录", ATTENDANCE_RECORDS_ENDPOINT),
+)
+PHASES = ("dns", "connect", "tls", "first_byte", "transfer", "total")
+PHASE_NAMES = {
+    "dns": "DNS",
+    "connect": "TCP 连接",
+    "tls": "TLS 握手",
+    "first_byte": "首字节",
+    "transfer": "传输",
+    "total": "合计",
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class ProbeResult:
+    __slots__ = ("timings", "status", "size", "server_date", "local_time", "error")
+
+    def __init__(self) -> None:
+        self.timings: Dict[str, float] = {}
+        self.status: Optional[int] = None
+        self.size = 0
+        self.server_date: Optional[float] = None
+        self.local_time = 0.0
+        self.error: Optional[str] = None
+
+    @property
+    def clock_skew(self) -> Optional[float]:
+        if self.server_date is None:
+            return None
+        return self.server_date - self.local_time
+
+
+class KeepAliveResult:
+    __slots__ = ("requests", "reused", "first_byte", "error")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.reused = 0
+        self.first_byte: List[float] = []
+        self.error: Optional[str] = None
+
+
+class NetworkDoctor:
+    def __init__(
+        self,
+        base_url: str,
+        samples: int = DOCTOR_SAMPLES,
+        timeout: float = REQUEST_TIMEOUT,
+        keepalive_requests: int = DOCTOR_KEEPALIVE_REQUESTS,
+    ):
+        parts = urlsplit(base_url)
+        self.base_url = base_url
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or ""
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.base_path = parts.path.rstrip("/")
+        self.samples = samples
+        self.timeout = timeout
+        self.keepalive_requests = keepalive_requests
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Host": self.host if self.port in (80, 443) else f"{self.host}:{self.port}",
+            "User-Agent": "pyinspur-doctor",
+            "Accept": "application/json",
+            "Connection": "keep-alive",
+        }
+
+    def _open(self, result: ProbeResult) -> http.client.HTTPConnection:
+        started = time.perf_counter()
+        address = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM)[0][4]
+        resolved = time.perf_counter()
+        sock = socket.create_connection(address[:2], timeout=CONNECT_TIMEOUT)
+        connected = time.perf_counter()
+        result.timings["dns"] = resolved - started
+        result.timings["connect"] = connected - resolved
+
+        if self.scheme == "https":
+            context = ssl.create_default_context()
+            sock = context.wrap_socket(sock, server_hostname=self.host)
+            conn: http.client.HTTPConnection = http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout, context=context
+            )
+            result.timings["tls"] = time.perf_counter() - connected
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            result.timings["tls"] = 0.0
+        sock.settimeout(self.timeout)
+        conn.sock = sock
+        return conn
+
+    def _send(
+        self, conn: http.client.HTTPConnection, path: str, result: ProbeResult
+    ) -> http.client.HTTPResponse:
+        sent = time.perf_counter()
+        conn.request("GET", f"{self.base_path}{path}", headers=self._headers())
+        response = conn.getresponse()
+        first_byte = time.perf_counter()
+        result.local_time = time.time()
+        body = response.read()
+        done = time.perf_counter()
+
+        result.timings["first_byte"] = first_byte - sent
+        result.timings["transfer"] = done - first_byte
+        result.status = response.status
+        result.size = len(body)
+        date_header = response.getheader("Date")
+        if date_header:
+            try:
+                result.server_date = parsedate_to_datetime(date_header).timestamp()
+            except (TypeError, ValueError):
+                pass
+        return response
+
+    def probe(self, path: str) -> ProbeResult:
+        result = ProbeResult()
+        started = time.perf_counter()
+        conn = None
+        try:
+            conn = self._open(result)
+            self._send(conn, path, result)
+        except (OSError, http.client.HTTPException) as e:
+            result.error = f"{type(e).__name__}: {e}"
+        finally:
+            if conn is not None:
+                conn.close()
+        result.timings["total"] = time.perf_counter() - started
+        return result
+
+    def check_keepalive(self, path: str) -> KeepAliveResult:
+        result = KeepAliveResult()
+        conn = None
+        try:
+            probe = ProbeResult()
+            conn = self._open(probe)
+            for _ in range(self.keepalive_requests):
+                sock = conn.sock
+                response = self._send(conn, path, probe)
+                result.requests += 1
+                if result.requests > 1 and conn.sock is sock and sock is not None:
+                    result.reused += 1
+                    result.first_byte.append(probe.timings["first_byte"])
+                if response.will_close:
+                    break
+        except (OSError, http.client.HTTPException) as e:
+            result.error = f"{type(e).__name__}: {e}"
+        finally:
+            if conn is not None:
+                conn.close()
+        return result
+
+    def run(self) -> Tuple[Dict[str, List[ProbeResult]], KeepAliveResult]:
+        results: Dict[str, List[ProbeResult]] = {}
+        for name, path in PROBE_PATHS:
+            results[name] = [self.probe(path) for _ in range(self.samples)]
+        keepalive = self.check_keepalive(ATTENDANCE_SITES_ENDPOINT)
+        return results, keepalive
+
+    def display(
+        self, results: Dict[str, List[ProbeResult]], keepalive: KeepAliveResult
+    ) -> None:
+        logger.info("=== 网络诊断: {} ({} 次采样) ===", self.base_url, self.samples)
+        skews: List[float] = []
+        for name, probes in results.items():
+            succeeded = [probe for probe in probes if probe.error is None]
+            failed = len(probes) - len(succeeded)
+            statuses = sorted({probe.status for probe in succeeded})
+            sizes = [probe.size for probe in succeeded]
+            logger.info(
+                "{}: 成功 {}/{}，状态码 {}，响应 {} 字节",
+                name,
+                len(succeeded),
+                len(probes),
+                statuses or "-",
+                int(statistics.median(sizes)) if sizes else 0,
+            )
+            for probe in probes:
+                if probe.error:
+                    logger.warning("  请求失败: {}", probe.error)
+                    break
+            if failed == len(probes):
+                continue
+
+            rows = []
+            for phase in PHASES:
+                values = [probe.timings.get(phase, 0.0) * 1000 for probe in succeeded]
+                rows.append(
+                    (
+                        PHASE_NAMES[phase],
+                        f"{percentile(values, 0.5):.1f}",
+                        f"{percentile(values, 0.9):.1f}",
+                        f"{max(values):.1f}",
+                    )
+                )
+            print_table(("阶段(ms)", "p50", "p90", "max"), rows, "<>>>")
+            skews.extend(
+                probe.clock_skew for probe in succeeded if probe.clock_skew is not None
+            )
+
+        if keepalive.error:
+            logger.warning("长连接检测失败: {}", keepalive.error)
+        elif keepalive.reused:
+            logger.info(
+                "长连接: {} 次请求复用连接 {} 次，复用时首字节 p50 {:.1f} ms",
+                keepalive.requests,
+                keepalive.reused,
+                percentile(keepalive.first_byte, 0.5) * 1000,
+            )
+        else:
+            logger.warning("长连接: 服务器未保持连接，每次请求都需要重新建立连接")
+
+        if skews:
+            skew = statistics.median(skews)
+            level = "warning" if abs(skew) > 60 else "info"
+            getattr(logger, level)(
+                "服务器时钟偏差约 {:+.1f} 秒（Date 头精度 1 秒，正数表示服务器较快）", skew
+            )
+        else:
+            logger.info("服务器未返回 Date 头，无法估计时钟偏差")
@@ -0,0 +1,154 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from inspur.circuit_breaker import STATE_OPEN, get_circuit_breaker
+from utils.constants import (ENDPOINT_ERROR_THRESHOLD, ENDPOINT_EWMA_ALPHA,
+                             ENDPOINT_FAILURE_LATENCY,
+                             ENDPOINT_RECOVERY_SECONDS)
+from utils.logger import get_logger
+from utils.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+
+class EndpointStats:
+    __slots__ = ("url", "latency", "error_rate", "last_failure_at", "samples")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.last_failure_at = 0.0
+        self.samples = 0
+
+    def effective_error_rate(self, now: float, recovery_seconds: float) -> float:
+        if not self.error_rate:
+            return 0.0
+        # 长时间未失败的地址错误率按半衰期衰减，使其有机会重新被选中
+        elapsed = now - self.last_failure_at
+        return self.error_rate * 0.5 ** (elapsed / recovery_seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency else None,
+            "error_rate": round(self.error_rate, 3),
+            "samples": self.samples,
+        }
+
+
+class EndpointSelector:
+    def __init__(
+        self,
+        urls: Iterable[str],
+        alpha: float = ENDPOINT_EWMA_ALPHA,
+        error_threshold: float = ENDPOINT_ERROR_THRESHOLD,
+        recovery_seconds: float = ENDPOINT_RECOVERY_SECONDS,
+        failure_latency: float = ENDPOINT_FAILURE_LATENCY,
+    ):
+        self.urls = list(dict.fromkeys(urls))
+        if not self.urls:
+            raise ValueError("至少需要配置一个考勤服务地址")
+        self.alpha = alpha
+        self.error_threshold = error_threshold
+        self.recovery_seconds = recovery_seconds
+        self.failure_latency = failure_latency
+        self._stats = {url: EndpointStats(url) for url in self.urls}
+        self._current = self.urls[0]
+        self._lock = threading.Lock()
+
+    def _is_healthy(self, stats: EndpointStats, now: float) -> bool:
+        if get_circuit_breaker(stats.url).state == STATE_OPEN:
+            return False
+        error_rate = stats.effective_error_rate(now, self.recovery_seconds)
+        return error_rate < self.error_threshold
+
+    def ranked(self) -> List[str]:
+        now = time.monotonic()
+        order = {url: index for index, url in enumerate(self.urls)}
+        with self._lock:
+            healthy = []
+            unhealthy = []
+            for stats in self._stats.values():
+                if self._is_healthy(stats, now):
+                    healthy.append(stats)
+                else:
+                    unhealthy.append(stats)
+
+            healthy.sort(key=lambda stats: (stats.latency or 0.0, order[stats.url]))
+            unhealthy.sort(
+                key=lambda stats: (
+                    stats.effective_error_rate(now, self.recovery_seconds),
+                    order[stats.url],
+                )
+            )
+            return [stats.url for stats in healthy + unhealthy]
+
+    def select(self, exclude: Iterable[str] = ()) -> str:
+        excluded = set(exclude)
+        ranked = self.ranked()
+        candidates = [url for url in ranked if url not in excluded] or ranked
+        url = candidates[0]
+        with self._lock:
+            previous, self._current = self._current, url
+        if url != previous:
+            logger.info("切换考勤服务地址: {} -> {}", previous, url)
+            get_metrics().increment("endpoint.switch", to=url)
+        return url
+
+    def _update_latency(self, stats: EndpointStats, latency: float) -> None:
+        stats.samples += 1
+        if stats.latency is None:
+            stats.latency = latency
+        else:
+            stats.latency += self.alpha * (latency - stats.latency)
+
+    def record_success(self, url: str, latency: float) -> None:
+        with self._lock:
+            stats = self._stats.get(url)
+            if stats is None:
+                return
+            self._update_latency(stats, latency)
+            stats.error_rate *= 1 - self.alpha
+        metrics = get_metrics()
+        metrics.increment("endpoint.requests", base_url=url, outcome="success")
+        metrics.observe("endpoint.latency_seconds", latency, base_url=url)
+
+    def record_failure(self, url: str) -> None:
+        with self._lock:
+            stats = self._stats.get(url)
+            if stats is None:
+                return
+            # 失败按固定惩罚耗时计入延迟，避免从未成功的地址排在最前
+            self._update_latency(stats, self.failure_latency)
+            stats.error_rate += self.alpha * (1 - stats.error_rate)
+            stats.last_failure_at = time.monotonic()
+        get_metrics().increment("endpoint.requests", base_url=url, outcome="failure")
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                dict(self._stats[url].to_dict(), current=url == self._current)
+                for url in self.urls
+            ]
+
+
+_selectors: Dict[Tuple[str, ...], EndpointSelector] = {}
+_selectors_lock = threading.Lock()
+
+
+def get_endpoint_selector(urls: Iterable[str]) -> EndpointSelector:
+    key = tuple(dict.fromkeys(urls))
+    with _selectors_lock:
+        selector = _selectors.get(key)
+        if selector is None:
+            selector = EndpointSelector(key)
+            _selectors[key] = selector
+        return selector
+
+
+def endpoint_snapshots() -> List[List[Dict[str, Any]]]:
+    with _selectors_lock:
+        selectors = list(_selectors.values())
+    return [selector.snapshot() for selector in selectors]
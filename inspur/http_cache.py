@@ -0,0 +1,322 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils.constants import (HTTP_CACHE_DIR, HTTP_CACHE_ENABLED,
+                             HTTP_CACHE_HEURISTIC_TTLS, HTTP_CACHE_MAX_BYTES)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STORED_HEADERS = (
+    "Content-Type",
+    "Cache-Control",
+    "ETag",
+    "Last-Modified",
+    "Date",
+    "Expires",
+)
+REQUIRED_META_KEYS = ("url", "endpoint", "status", "headers", "size", "expires_at")
+
+
+def _valid_meta(meta: Any) -> bool:
+    return isinstance(meta, dict) and all(key in meta for key in REQUIRED_META_KEYS)
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class CacheEntry:
+    def __init__(self, key: str, meta: Dict[str, Any], body: bytes):
+        self.key = key
+        self.meta = meta
+        self.body = body
+
+    @property
+    def url(self) -> str:
+        return self.meta["url"]
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return self.meta["headers"]
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.meta["expires_at"]
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.headers.get("ETag"):
+            headers["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+    def to_response(self) -> requests.Response:
+        response = requests.Response()
+        response.status_code = self.meta["status"]
+        response.reason = "OK"
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = self.body
+        return response
+
+
+class HttpCache:
+    def __init__(
+        self,
+        cache_dir: str = HTTP_CACHE_DIR,
+        max_bytes: int = HTTP_CACHE_MAX_BYTES,
+        heuristic_ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.heuristic_ttls = (
+            HTTP_CACHE_HEURISTIC_TTLS if heuristic_ttls is None else heuristic_ttls
+        )
+        self._index: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    @staticmethod
+    def cache_url(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        return requests.Request("GET", url, params=params).prepare().url
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.json", f"{base}.body"
+
+    def _load_index(self) -> None:
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.cache_dir, name)
+            try:
+                with open(meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+                mtime = os.path.getmtime(meta_path)
+            except (OSError, ValueError) as e:
+                meta, mtime = None, 0.0
+                logger.debug("读取缓存条目失败 {}: {}", name, e)
+            if not _valid_meta(meta):
+                # 截断或旧格式的条目直接删除
+                logger.debug("删除损坏的缓存条目: {}", name)
+                self._delete_files(name[:-5])
+                continue
+            entries.append((mtime, name[:-5], meta))
+
+        for _, key, meta in sorted(entries, key=lambda item: item[0]):
+            self._index[key] = (meta["size"], meta["url"])
+            self._total_bytes += meta["size"]
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            self._remove(key)
+            return None
+        if not _valid_meta(meta):
+            self._remove(key)
+            return None
+        return CacheEntry(key, meta, body)
+
+    def store(
+        self, url: str, endpoint: str, response: requests.Response
+    ) -> Optional[CacheEntry]:
+        directives = parse_cache_control(response.headers.get("Cache-Control"))
+        if "no-store" in directives:
+            return None
+
+        headers = {
+            name: response.headers[name]
+            for name in STORED_HEADERS
+            if name in response.headers
+        }
+        body = response.content
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        meta = {
+            "url": url,
+            "endpoint": endpoint,
+            "status": response.status_code,
+            "headers": headers,
+            "size": len(body),
+            "stored_at": time.time(),
+            "expires_at": self._expires_at(endpoint, headers),
+        }
+        if meta["size"] > self.max_bytes:
+            return None
+        if meta["expires_at"] <= time.time() and not (
+            "ETag" in headers or "Last-Modified" in headers
+        ):
+            return None
+
+        self._write_entry(key, meta, body)
+        return CacheEntry(key, meta, body)
+
+    def revalidated(
+        self, entry: CacheEntry, response: requests.Response
+    ) -> CacheEntry:
+        for name in STORED_HEADERS:
+            if name in response.headers and name != "Content-Type":
+                entry.headers[name] = response.headers[name]
+        entry.meta["expires_at"] = self._expires_at(
+            entry.meta["endpoint"], entry.headers
+        )
+        self._write_entry(entry.key, entry.meta, None)
+        return entry
+
+    def invalidate(self, endpoint: str) -> None:
+        with self._lock:
+            keys = [key for key, (_, url) in self._index.items() if endpoint in url]
+        for key in keys:
+            self._remove(key)
+
+    def purge_user(self, user_id: str) -> None:
+        # 缓存地址中带有 userId 参数的条目属于该用户
+        with self._lock:
+            keys = [
+                key
+                for key, (_, url) in self._index.items()
+                if ("userId", user_id) in parse_qsl(urlsplit(url).query)
+            ]
+        for key in keys:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            keys = list(self._index)
+        for key in keys:
+            self._remove(key)
+
+    def _expires_at(self, endpoint: str, headers: Dict[str, str]) -> float:
+        now = time.time()
+        directives = parse_cache_control(headers.get("Cache-Control"))
+        if "no-cache" in directives:
+            return now
+
+        for name in ("s-maxage", "max-age"):
+            if name in directives:
+                try:
+                    return now + max(int(directives[name] or 0), 0)
+                except ValueError:
+                    return now
+
+        expires = _parse_http_date(headers.get("Expires"))
+        if expires is not None:
+            date = _parse_http_date(headers.get("Date")) or now
+            return now + max(expires - date, 0)
+
+        ttl = self.heuristic_ttls.get(endpoint, 0)
+        last_modified = _parse_http_date(headers.get("Last-Modified"))
+        if last_modified is not None:
+            date = _parse_http_date(headers.get("Date")) or now
+            ttl = min(ttl, max(date - last_modified, 0) * 0.1)
+        return now + ttl
+
+    def _write_entry(self, key: str, meta: Dict[str, Any], body: Optional[bytes]) -> None:
+        meta_path, body_path = self._paths(key)
+        try:
+            # 缓存目录只允许当前系统用户访问
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            if body is not None:
+                with open(f"{body_path}.tmp", "wb") as f:
+                    f.write(body)
+                os.replace(f"{body_path}.tmp", body_path)
+            with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(f"{meta_path}.tmp", meta_path)
+        except OSError as e:
+            logger.warning("写入 HTTP 缓存失败: {}", e)
+            return
+
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous:
+                self._total_bytes -= previous[0]
+            self._index[key] = (meta["size"], meta["url"])
+            self._total_bytes += meta["size"]
+            evicted = []
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                old_key, (size, _) = self._index.popitem(last=False)
+                self._total_bytes -= size
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            self._delete_files(old_key)
+
+    def _remove(self, key: str) -> None:
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous:
+                self._total_bytes -= previous[0]
+        self._delete_files(key)
+
+    def _delete_files(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.debug("删除缓存文件失败 {}: {}", path, e)
+
+
+_default_cache: Optional[HttpCache] = None
+_default_cache_lock = threading.Lock()
+_options = {"enabled": HTTP_CACHE_ENABLED}
+
+
+def configure_http_cache(enabled: bool) -> None:
+    _options["enabled"] = enabled
+
+
+def http_cache_enabled() -> bool:
+    return _options["enabled"]
+
+
+def get_http_cache() -> HttpCache:
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HttpCache()
+        return _default_cache
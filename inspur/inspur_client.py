@@ -1,21 +1,51 @@
 import hashlib
 import math
 import random
+import sqlite3
+import threading
 import time
 import uuid
+from concurrent.futures import Future
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
-from inspur.config_manager import ConfigManager
+from inspur.attendance_snapshot import (AttendanceSnapshotStore, MonthSnapshot,
+                                       get_snapshot_store)
+from inspur.attendance_warehouse import (AttendanceWarehouse, get_warehouse,
+                                         month_range, months_between)
+from inspur.circuit_breaker import (STATE_OPEN, CircuitOpenError,
+                                    get_circuit_breaker, is_backend_failure)
+from inspur.config_manager import get_config_manager
+from inspur.deadline import (DeadlineExceededError, current_deadline,
+                             deadline_scope, request_timeout)
+from inspur.endpoint_selector import EndpointSelector, get_endpoint_selector
+from inspur.http_cache import HttpCache, get_http_cache, http_cache_enabled
+from inspur.models import (AttendanceRecord, AttendanceSite, ClientState,
+                           UserInfo, sites_to_config)
+from inspur.outbox import AttendanceOutbox, get_outbox
+from inspur.rate_limiter import get_rate_limiter
+from inspur.single_flight import SingleFlight, clone_response
+from inspur.transport import Transport, create_transport
+from utils import json_codec
 from utils.common_utils import get_user_choice_from_list
-from utils.constants import (DEFAULT_BASE_URL, EARTH_RADIUS_METERS,
-                             MAX_RETRIES, PI, REQUEST_TIMEOUT)
+from utils.constants import (CONNECT_TIMEOUT, DEFAULT_BASE_URL,
+                             EARTH_RADIUS_METERS, MAX_RETRIES, OUTBOX_ENABLED,
+                             PI, PREFETCH_TTL, REQUEST_TIMEOUT,
+                             WAREHOUSE_ENABLED, WAREHOUSE_MAX_SYNC_MONTHS)
 from utils.logger import get_logger
+from utils.metrics import get_metrics
+from utils.table_renderer import print_table
+from utils.tracing import current_span, start_span, traced
 
 logger = get_logger(__name__)
 
+ATTENDANCE_RECORDS_ENDPOINT = "/urms/plugins/check/tcheckattendance/findPageForPhone.ilf"
+ATTENDANCE_CREATE_ENDPOINT = "/urms/plugins/check/tcheckattendance/create.ilf"
+ATTENDANCE_SITES_ENDPOINT = "/urms/plugins/check/tcheckattendancesite/findForPhone.ilf"
+LOGIN_ENDPOINT = "/urms/plugins/user/usermgr/login.ilf"
+
 
 def md5_encrypt(text: str) -> str:
     return hashlib.md5(text.encode("utf-8")).hexdigest()
@@ -26,21 +56,51 @@ def generate_mobile_uuid() -> str:
 
 
 class InspurClient:
+    # 并发约定：同一实例可在多个线程间共享。用户、考勤点、设备UUID 保存在不可变的
+    # ClientState 中，修改时在锁内整体替换，每次调用开始时取一次快照并全程使用；
+    # 预取表在锁内读写；传输层、快照存储、HTTP 缓存各自保证线程安全。
+    # 登录切换用户不会影响已在进行中的调用。
+
     def __init__(
         self,
         base_url: str = DEFAULT_BASE_URL,
         random_radius_meters: Optional[int] = None,
         client_uuid: Optional[str] = None,
+        snapshot_store: Optional[AttendanceSnapshotStore] = None,
+        http_cache: Optional[HttpCache] = None,
+        outbox: Optional[AttendanceOutbox] = None,
+        transport: Optional[Transport] = None,
+        base_urls: Optional[List[str]] = None,
+        warehouse: Optional[AttendanceWarehouse] = None,
     ):
-        self.base_url = base_url
+        self.base_urls = list(base_urls) if base_urls else [base_url]
+        self.base_url = self.base_urls[0]
+        self.endpoint_selector: Optional[EndpointSelector] = None
+        if len(self.base_urls) > 1:
+            self.endpoint_selector = get_endpoint_selector(self.base_urls)
         self.random_radius_meters = random_radius_meters
-        self.session = requests.Session()
+        self.transport = transport or create_transport()
         self.log = logger
-        self.user_info: Dict[str, Any] = {}
-        self.attendance_site: Dict[str, Any] = {}
-        self.client_uuid = client_uuid
-
-        self.session.headers.update(
+        self._lock = threading.RLock()
+        self._uuid_prompt_lock = threading.Lock()
+        # 只合并本实例（同一用户、同一会话）的并发读请求
+        self._read_flight = SingleFlight()
+        self._state = ClientState(client_uuid=client_uuid)
+        self._prefetched_attendance: Dict[
+            str, Tuple[float, Optional[str], Future]
+        ] = {}
+        self.snapshot_store = snapshot_store or get_snapshot_store()
+        if http_cache is None and http_cache_enabled():
+            http_cache = get_http_cache()
+        self.http_cache = http_cache
+        if outbox is None and OUTBOX_ENABLED:
+            outbox = get_outbox()
+        self.outbox = outbox
+        if warehouse is None and WAREHOUSE_ENABLED:
+            warehouse = get_warehouse()
+        self.warehouse = warehouse
+
+        self.transport.headers.update(
             {
                 "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 19_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 Html5Plus/1.0",
                 "Accept": "application/json",
@@ -51,6 +111,38 @@ class InspurClient:
             }
         )
 
+    @property
+    def state(self) -> ClientState:
+        return self._state
+
+    def _replace_state(self, **changes: Any) -> None:
+        with self._lock:
+            self._state = self._state.replace(**changes)
+
+    @property
+    def user_info(self) -> Optional[UserInfo]:
+        return self._state.user_info
+
+    @user_info.setter
+    def user_info(self, value: Optional[UserInfo]) -> None:
+        self._replace_state(user_info=value)
+
+    @property
+    def attendance_site(self) -> Optional[AttendanceSite]:
+        return self._state.attendance_site
+
+    @attendance_site.setter
+    def attendance_site(self, value: Optional[AttendanceSite]) -> None:
+        self._replace_state(attendance_site=value)
+
+    @property
+    def client_uuid(self) -> Optional[str]:
+        return self._state.client_uuid
+
+    @client_uuid.setter
+    def client_uuid(self, value: Optional[str]) -> None:
+        self._replace_state(client_uuid=value)
+
     def _make_request_with_retry(
         self, method: str, endpoint: str, body=None, headers=None, params=None, **kwargs
     ) -> requests.Response:
@@ -60,8 +152,6 @@ class InspurClient:
         if headers:
             request_headers.update(headers)
 
-        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
-
         if body is not None:
             kwargs["data"] = body
 
@@ -72,11 +162,74 @@ class InspurClient:
         data_str = kwargs.get("data", "")
         self.log.debug("{} {} {} {}", method, url, params_str, data_str)
 
+        if method != "GET":
+            return self._request_with_retry(method, endpoint, request_headers, kwargs)
+
+        flight_key = (
+            url,
+            repr(sorted((kwargs.get("params") or {}).items())),
+            repr(sorted(request_headers.items())),
+        )
+        deadline = current_deadline()
+        led = []
+
+        def lead() -> requests.Response:
+            led.append(True)
+            return self._request_with_retry(method, endpoint, request_headers, kwargs)
+
+        try:
+            response, shared = self._read_flight.do(
+                flight_key,
+                lead,
+                wait_timeout=deadline.remaining() if deadline else None,
+            )
+        except TimeoutError:
+            raise DeadlineExceededError(f"等待并发请求超出时间预算: {endpoint}")
+        except DeadlineExceededError:
+            if led:
+                raise
+            # 领头请求超出的是它自己的时间预算，按本次调用的预算单独请求
+            return self._request_with_retry(method, endpoint, request_headers, kwargs)
+        if shared:
+            self.log.debug("合并相同的并发请求: {}", endpoint)
+            return clone_response(response)
+        return response
+
+    def _select_base_url(self, failed: List[str]) -> str:
+        if self.endpoint_selector is None:
+            return self.base_url
+        return self.endpoint_selector.select(failed)
+
+    def _request_with_retry(
+        self,
+        method: str,
+        endpoint: str,
+        request_headers: Dict[str, str],
+        kwargs: Dict[str, Any],
+    ) -> requests.Response:
+        deadline = current_deadline()
+        failed: List[str] = []
         for attempt in range(MAX_RETRIES):
+            base_url = self._select_base_url(failed)
+            timeout = kwargs.get("timeout") or request_timeout()
             try:
-                response = self.session.request(
-                    method, url, headers=request_headers, **kwargs
-                )
+                with start_span(
+                    f"HTTP {method}",
+                    **{
+                        "http.method": method,
+                        "http.route": endpoint,
+                        "http.attempt": attempt,
+                        "http.base_url": base_url,
+                    },
+                ) as span:
+                    response = self._send_request(
+                        method,
+                        base_url,
+                        endpoint,
+                        request_headers,
+                        dict(kwargs, timeout=timeout),
+                    )
+                    span.set_attribute("http.status_code", response.status_code)
                 response.raise_for_status()
 
                 status_text = "OK" if response.ok else "ERROR"
@@ -87,28 +240,166 @@ class InspurClient:
                     response.text,
                 )
                 return response
+            except DeadlineExceededError as e:
+                self.log.error("请求失败，已超出时间预算: {}", e)
+                raise
+            except CircuitOpenError as e:
+                self.log.error("{}", e)
+                raise
             except requests.exceptions.RequestException as e:
+                if self._budget_limited(e, timeout):
+                    # 超时已按剩余预算缩短，重试也来不及，按超出时间预算处理
+                    self.log.error("请求失败，已超出时间预算: {}", e)
+                    raise DeadlineExceededError(
+                        f"请求超出时间预算: {endpoint}"
+                    ) from e
+                backend_failure = is_backend_failure(e)
                 if attempt == MAX_RETRIES - 1:
                     self.log.error(f"请求失败，已重试{MAX_RETRIES}次: {e}")
                     raise
+                if backend_failure and self.endpoint_selector is not None:
+                    failed.append(base_url)
+                    if any(url not in failed for url in self.base_urls):
+                        self.log.warning(
+                            "{} 请求失败，切换备用地址重试: {}", base_url, e
+                        )
+                        get_metrics().increment(
+                            "endpoint.failover", base_url=base_url
+                        )
+                        continue
+                if get_circuit_breaker(base_url).state == STATE_OPEN:
+                    self.log.error("请求失败，考勤服务已熔断: {}", e)
+                    raise
+                backoff = 2**attempt
+                if deadline is not None and deadline.remaining() <= backoff:
+                    self.log.error("请求失败，剩余时间不足以重试: {}", e)
+                    raise
                 self.log.warning(f"请求失败，第{attempt + 1}次重试: {e}")
-                time.sleep(2**attempt)
+                time.sleep(backoff)
         self.log.error("请求失败")
         raise requests.exceptions.RequestException("请求失败")
 
+    @staticmethod
+    def _budget_limited(error: Exception, timeout: Any) -> bool:
+        # 按剩余时间预算缩短的超时不代表考勤服务故障
+        if not isinstance(error, requests.exceptions.Timeout) or not isinstance(
+            timeout, tuple
+        ):
+            return False
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return timeout[0] < CONNECT_TIMEOUT
+        return timeout[1] < REQUEST_TIMEOUT
+
+    def _send_request(
+        self,
+        method: str,
+        base_url: str,
+        endpoint: str,
+        request_headers: Dict[str, str],
+        kwargs: Dict[str, Any],
+    ) -> requests.Response:
+        cache = self.http_cache
+        if (
+            cache is None
+            or method != "GET"
+            or "If-None-Match" in request_headers
+            or "If-Modified-Since" in request_headers
+        ):
+            return self._throttled_request(
+                method, base_url, endpoint, request_headers, kwargs
+            )
+
+        # 缓存按主地址记录，切换备用地址后仍可命中
+        cache_url = cache.cache_url(
+            f"{self.base_url}{endpoint}", kwargs.get("params")
+        )
+        entry = cache.lookup(cache_url)
+        revalidate = "no-cache" in request_headers.get("Cache-Control", "")
+        if entry is not None and entry.is_fresh() and not revalidate:
+            self.log.debug("命中 HTTP 缓存: {}", endpoint)
+            return entry.to_response()
+
+        headers = dict(request_headers)
+        if entry is not None:
+            headers.update(entry.conditional_headers())
+
+        response = self._throttled_request(
+            method, base_url, endpoint, headers, kwargs
+        )
+        if response.status_code == 304 and entry is not None:
+            self.log.debug("HTTP 缓存已验证: {}", endpoint)
+            return cache.revalidated(entry, response).to_response()
+        if response.status_code == 200:
+            cache.store(cache_url, endpoint, response)
+        return response
+
+    def _throttled_request(
+        self,
+        method: str,
+        base_url: str,
+        endpoint: str,
+        headers: Dict[str, str],
+        kwargs: Dict[str, Any],
+    ) -> requests.Response:
+        waited = get_rate_limiter().acquire(base_url, endpoint)
+        if waited and current_deadline() is not None:
+            # 限流等待占用了时间预算，按剩余时间重新计算超时
+            kwargs = dict(kwargs, timeout=request_timeout())
+
+        # 熔断器只统计真正发往考勤服务的请求，缓存命中不经过这里
+        breaker = get_circuit_breaker(base_url)
+        breaker.before_call()
+        selector = self.endpoint_selector
+        url = f"{base_url}{endpoint}"
+        started = time.perf_counter()
+        # None 表示结果不说明服务是否健康，只归还半开探测名额
+        healthy: Optional[bool] = None
+        try:
+            response = self.transport.request(method, url, headers=headers, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if is_backend_failure(e) and not self._budget_limited(
+                e, kwargs.get("timeout")
+            ):
+                healthy = False
+            if selector is not None:
+                selector.record_failure(base_url)
+            raise
+        else:
+            healthy = response.status_code < 500
+            if selector is not None:
+                if healthy:
+                    selector.record_success(base_url, time.perf_counter() - started)
+                else:
+                    selector.record_failure(base_url)
+            return response
+        finally:
+            if healthy is None:
+                breaker.release()
+            elif healthy:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+
+    def warm_up_connection(self) -> None:
+        try:
+            self.transport.request(
+                "HEAD",
+                self.base_url,
+                timeout=(CONNECT_TIMEOUT, REQUEST_TIMEOUT),
+                allow_redirects=False,
+            )
+        except requests.exceptions.RequestException as e:
+            self.log.debug("预连接失败: {}", e)
+
     def _load_saved_attendance_site(self) -> bool:
         try:
-            config_manager = ConfigManager()
+            config_manager = get_config_manager()
             attendance_sites, checkin_site_address = config_manager.load_checkin_site()
             if attendance_sites and checkin_site_address:
                 if checkin_site_address in attendance_sites:
-                    site_data = attendance_sites[checkin_site_address]
-                    self.attendance_site = {
-                        "id": site_data["id"],
-                        "latitude": site_data["latitude"],
-                        "longitude": site_data["longitude"],
-                        "address": checkin_site_address,
-                    }
+                    self.attendance_site = AttendanceSite.from_config(
+                        checkin_site_address, attendance_sites[checkin_site_address]
+                    )
                     self.log.info("✓ 加载已保存的签到考勤点: {}", checkin_site_address)
                     return True
             return False
@@ -140,27 +431,18 @@ class InspurClient:
 
         return str(new_lng), str(new_lat)
 
-    def _display_attendance_table(self, records: List[Dict[str, Any]]) -> None:
-        self.log.info("-" * 50)
-        self.log.info("日期        签到时间    签退时间")
-        self.log.info("-" * 50)
-        for record in records:
-            date = record["SIGNTIME"]
-
-            sign_in_time = record.get("SIGNINTIME", "")
-            if not sign_in_time or sign_in_time == "-":
-                sign_in = "未签到"
-            else:
-                sign_in = sign_in_time
-
-            sign_out_time = record.get("SIGNOUTTIME", "")
-            if not sign_out_time or sign_out_time == "-":
-                sign_out = "未签退"
-            else:
-                sign_out = sign_out_time
-
-            self.log.info(f"{date:<12} {sign_in:<11} {sign_out}")
-        self.log.info("-" * 50)
+    def _display_attendance_table(self, records: List[AttendanceRecord]) -> None:
+        print_table(
+            ("日期", "签到时间", "签退时间"),
+            [
+                (
+                    record.sign_time,
+                    record.sign_in_time if record.signed_in else "未签到",
+                    record.sign_out_time if record.signed_out else "未签退",
+                )
+                for record in records
+            ],
+        )
 
     def _perform_login_request(
         self,
@@ -168,21 +450,16 @@ class InspurClient:
         silent: bool = False,
         return_credentials: bool = False,
     ) -> Dict[str, Any]:
-        endpoint = "/urms/plugins/user/usermgr/login.ilf"
+        endpoint = LOGIN_ENDPOINT
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
         response = self._make_request_with_retry(
             "POST", endpoint, body=data, headers=headers
         )
-        result = response.json()
+        result = json_codec.decode_response(response)
 
         if result["status"] == "success":
-            user_data = result["result"]
-            self.user_info = {
-                "phone": user_data["PHONE"],
-                "user_id": user_data["USER_ID"],
-                "user_name": user_data["USER_NAME"],
-            }
+            self.user_info = UserInfo.from_server(result["result"])
             response_data = {"success": True, "data": result}
             if return_credentials:
                 response_data.update(
@@ -210,10 +487,13 @@ class InspurClient:
         return self._perform_login_request(data, silent, True)
 
     def get_attendance_sites(
-        self, longitude: Optional[float] = None, latitude: Optional[float] = None
+        self,
+        longitude: Optional[float] = None,
+        latitude: Optional[float] = None,
+        display: bool = True,
     ) -> Dict[str, Any]:
         if longitude is None or latitude is None:
-            config_manager = ConfigManager()
+            config_manager = get_config_manager()
             config = config_manager.load_config()
             default_lng = config["default_longitude"]
             default_lat = config["default_latitude"]
@@ -264,15 +544,17 @@ class InspurClient:
             else:
                 return {"success": False, "error": "坐标输入失败，请重试"}
 
-        endpoint = "/urms/plugins/check/tcheckattendancesite/findForPhone.ilf"
+        endpoint = ATTENDANCE_SITES_ENDPOINT
         params = {"longitude": longitude, "latitude": latitude}
         headers = {}
 
         response = self._make_request_with_retry(
             "GET", endpoint, params=params, headers=headers
         )
-        result = response.json()
+        result = json_codec.decode_response(response)
 
+        if not display:
+            return result
         if result["attendanceSites"]:
             self.log.info("找到 {} 个考勤点:", len(result["attendanceSites"]))
             for i, site in enumerate(result["attendanceSites"], 1):
@@ -282,10 +564,28 @@ class InspurClient:
 
         return result
 
+    def fetch_attendance_sites(
+        self, longitude: float, latitude: float
+    ) -> List[AttendanceSite]:
+        response = self._make_request_with_retry(
+            "GET",
+            ATTENDANCE_SITES_ENDPOINT,
+            params={"longitude": longitude, "latitude": latitude},
+            headers={},
+        )
+        return self.parse_attendance_sites(json_codec.decode_response(response))
+
+    @staticmethod
+    def parse_attendance_sites(sites_result: Dict[str, Any]) -> List[AttendanceSite]:
+        return [
+            AttendanceSite.from_server(site)
+            for site in sites_result.get("attendanceSites") or []
+        ]
+
     def _select_attendance_site(
-        self, sites: List[Dict[str, Any]], action_name: str = "考勤"
-    ) -> Optional[Dict[str, Any]]:
-        addresses = [site["address"] for site in sites]
+        self, sites: List[AttendanceSite], action_name: str = "考勤"
+    ) -> Optional[AttendanceSite]:
+        addresses = [site.address for site in sites]
 
         choice_num = get_user_choice_from_list(addresses, f"请选择{action_name}考勤点")
 
@@ -293,43 +593,106 @@ class InspurClient:
             return sites[choice_num - 1]
         return None
 
-    def check_in(self, offset_radius: Optional[int] = None) -> Dict[str, Any]:
-        return self._perform_attendance_action(
-            "签到", offset_radius, "签到", is_checkout=False
-        )
+    def check_in(
+        self,
+        offset_radius: Optional[int] = None,
+        site: Optional[AttendanceSite] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        with deadline_scope(deadline):
+            return self._perform_attendance_action(
+                "签到", offset_radius, "签到", is_checkout=False, site=site
+            )
 
-    def check_out(self, offset_radius: Optional[int] = None) -> Dict[str, Any]:
-        return self._perform_attendance_action(
-            "签退", offset_radius, "签退", is_checkout=True
-        )
+    def check_out(
+        self,
+        offset_radius: Optional[int] = None,
+        site: Optional[AttendanceSite] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        with deadline_scope(deadline):
+            return self._perform_attendance_action(
+                "签退", offset_radius, "签退", is_checkout=True, site=site
+            )
 
+    @traced("attendance.action")
     def _perform_attendance_action(
         self,
         attendance_type: str,
         offset_radius: Optional[int] = None,
         action_name: str = "",
         is_checkout: bool = False,
+        site: Optional[AttendanceSite] = None,
     ) -> Dict[str, Any]:
-        if not self.user_info:
+        span = current_span()
+        span.set_attribute("attendance.type", attendance_type)
+        user_info = self.user_info
+        if not user_info:
             self.log.error("请先登录")
             return {"success": False, "error": "缺少必要信息"}
 
-        selected_site = self._handle_site_selection_for_action(action_name, is_checkout)
+        if site is not None:
+            selected_site = site
+        else:
+            selected_site = self._handle_site_selection_for_action(
+                action_name, is_checkout
+            )
         if not selected_site:
             self.log.warning("未选择考勤点，操作取消")
             return {"success": False, "error": "未选择考勤点"}
+        span.set_attribute("attendance.site", selected_site.address)
 
         if offset_radius is None:
             offset_radius = self.random_radius_meters
 
-        endpoint = "/urms/plugins/check/tcheckattendance/create.ilf"
-        base_lng = float(selected_site["longitude"])
-        base_lat = float(selected_site["latitude"])
+        base_lng = float(selected_site.longitude)
+        base_lat = float(selected_site.latitude)
         new_lng_str, new_lat_str = self._generate_random_coordinates(
             base_lng, base_lat, offset_radius
         )
 
-        if self.client_uuid is None:
+        attendance_uuid = self._ensure_client_uuid(user_info)
+
+        data = {
+            "userName": user_info.user_name,
+            "userId": user_info.user_id,
+            "attendanceType": attendance_type,
+            "longitude": new_lng_str,
+            "address": selected_site.address,
+            "latitude": new_lat_str,
+            "resId": selected_site.id,
+            "UUID": attendance_uuid,
+        }
+
+        try:
+            return self.submit_attendance(data)
+        except requests.exceptions.RequestException as e:
+            # 超出时间预算（含限流等待）不代表网络不可用，直接报告给调用方
+            if (
+                self.outbox is None
+                or isinstance(e, DeadlineExceededError)
+                or not is_backend_failure(e)
+            ):
+                raise
+            entry = self.outbox.enqueue(user_info.user_id, attendance_type, data)
+            span.set_attribute("attendance.queued", True)
+            self.log.warning("网络不可用，{}请求已加入离线队列，恢复后自动提交", action_name)
+            return {
+                "success": False,
+                "queued": True,
+                "idempotency_key": entry.idempotency_key,
+                "error": f"网络不可用，已加入离线队列: {e}",
+            }
+
+    def _ensure_client_uuid(self, user_info: UserInfo) -> str:
+        if self.client_uuid is not None:
+            return self.client_uuid
+
+        # 只串行化输入提示；等待输入期间不持有状态锁，其他线程可继续读写状态
+        with self._uuid_prompt_lock:
+            if self.client_uuid is not None:
+                return self.client_uuid
+
             uuid_input = input("请输入真实设备UUID（回车则模拟生成）: ").strip()
             attendance_uuid = uuid_input if uuid_input else generate_mobile_uuid()
             self.log.info(
@@ -337,47 +700,40 @@ class InspurClient:
                 "使用真实" if uuid_input else "生成模拟",
                 attendance_uuid,
             )
+            self.client_uuid = attendance_uuid
             try:
-                config_manager = ConfigManager()
-                encrypted_phone = md5_encrypt(self.user_info["phone"])
+                config_manager = get_config_manager()
+                encrypted_phone = md5_encrypt(user_info.phone)
                 config_manager.save_client_uuid(encrypted_phone, attendance_uuid)
-                self.client_uuid = attendance_uuid
                 self.log.info("已保存设备UUID: {}", attendance_uuid)
             except Exception as e:
                 self.log.warning("保存设备UUID失败: {}", e)
-                self.client_uuid = attendance_uuid
-        else:
-            attendance_uuid = self.client_uuid
-
-        data = {
-            "userName": self.user_info["user_name"],
-            "userId": self.user_info["user_id"],
-            "attendanceType": attendance_type,
-            "longitude": new_lng_str,
-            "address": selected_site["address"],
-            "latitude": new_lat_str,
-            "resId": selected_site["id"],
-            "UUID": attendance_uuid,
-        }
+            return attendance_uuid
 
+    def submit_attendance(self, data: Dict[str, Any]) -> Dict[str, Any]:
         headers = {
             "Content-Type": "application/x-www-form-urlencoded",
         }
 
         response = self._make_request_with_retry(
-            "POST", endpoint, body=data, headers=headers
+            "POST", ATTENDANCE_CREATE_ENDPOINT, body=data, headers=headers
         )
-        result = response.json()
+        result = json_codec.decode_response(response)
 
         if not result["success"]:
             self.log.error("考勤操作失败: {}", result.get("message", "未知错误"))
+        else:
+            self.discard_prefetched_attendance()
+            if self.http_cache is not None:
+                self.http_cache.invalidate(ATTENDANCE_RECORDS_ENDPOINT)
 
         return result
 
+    @traced("attendance.site_selection")
     def _handle_site_selection_for_action(
         self, action_name: str, is_checkout: bool = False
-    ) -> Optional[Dict[str, Any]]:
-        config_manager = ConfigManager()
+    ) -> Optional[AttendanceSite]:
+        config_manager = get_config_manager()
 
         if is_checkout:
             load_method = config_manager.load_checkout_site
@@ -405,17 +761,13 @@ class InspurClient:
         load_method,
         save_method,
         is_checkout: bool = False,
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[AttendanceSite]:
         attendance_sites, saved_address = load_method()
 
         if saved_address and saved_address in attendance_sites:
-            selected_site_data = attendance_sites[saved_address]
-            selected_site = {
-                "id": selected_site_data["id"],
-                "latitude": selected_site_data["latitude"],
-                "longitude": selected_site_data["longitude"],
-                "address": saved_address,
-            }
+            selected_site = AttendanceSite.from_config(
+                saved_address, attendance_sites[saved_address]
+            )
             self.log.info(
                 "使用已保存的{}考勤点: {}",
                 action_name,
@@ -445,7 +797,7 @@ class InspurClient:
         site_type: str,
         save_method,
         is_checkout: bool = False,
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[AttendanceSite]:
         self.log.info("请选择{}考勤点:", site_type)
         addresses = list(attendance_sites.keys())
 
@@ -457,13 +809,9 @@ class InspurClient:
             return None
 
         selected_address = addresses[selected_index - 1]
-        selected_site_data = attendance_sites[selected_address]
-        selected_site = {
-            "id": selected_site_data["id"],
-            "latitude": selected_site_data["latitude"],
-            "longitude": selected_site_data["longitude"],
-            "address": selected_address,
-        }
+        selected_site = AttendanceSite.from_config(
+            selected_address, attendance_sites[selected_address]
+        )
 
         save_method(selected_address)
         self.log.info("✓ 已选择并保存{}考勤点: {}", action_name, selected_address)
@@ -480,38 +828,23 @@ class InspurClient:
         site_type: str,
         save_method,
         is_checkout: bool = False,
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[AttendanceSite]:
         self.log.info("未找到已保存的考勤点，正在获取考勤点列表...")
         sites_result = self.get_attendance_sites()
 
-        if sites_result["attendanceSites"]:
-            sites = sites_result["attendanceSites"]
+        if sites_result.get("attendanceSites"):
+            sites = self.parse_attendance_sites(sites_result)
             self.log.info("请选择{}考勤点（将保存供以后使用）:", site_type)
 
-            selected_site_data = self._select_attendance_site(sites, action_name)
-            if selected_site_data:
-                selected_site = {
-                    "id": str(selected_site_data["id"]),
-                    "latitude": selected_site_data["latitude"],
-                    "longitude": selected_site_data["longitude"],
-                    "address": selected_site_data["address"],
-                }
-
-                attendance_sites = {
-                    site["address"]: {
-                        "id": str(site["id"]),
-                        "latitude": site["latitude"],
-                        "longitude": site["longitude"],
-                    }
-                    for site in sites
-                }
-                config_manager.save_attendance_sites(attendance_sites)
+            selected_site = self._select_attendance_site(sites, action_name)
+            if selected_site:
+                config_manager.merge_attendance_sites(sites_to_config(sites))
 
-                save_method(selected_site["address"])
+                save_method(selected_site.address)
                 self.log.info(
                     "✓ 已选择并保存{}考勤点: {}",
                     action_name,
-                    selected_site["address"],
+                    selected_site.address,
                 )
 
                 if not is_checkout:
@@ -522,35 +855,228 @@ class InspurClient:
             self.log.error("未找到考勤点")
         return None
 
+    @traced("attendance.monthly")
     def get_monthly_attendance(
         self,
         month: Optional[str] = None,
         last_only: bool = False,
         action_type: str = "",
+        display: bool = True,
     ) -> Dict[str, Any]:
-        if not self.user_info:
+        user_info = self.user_info
+        if not user_info:
             self.log.error("请先登录")
             return {"error": "请先登录"}
 
         if not month:
             month = datetime.now().strftime("%Y-%m")
 
-        endpoint = "/urms/plugins/check/tcheckattendance/findPageForPhone.ilf"
-        params = {"userId": self.user_info["user_id"], "month": month}
-        headers = {}
+        span = current_span()
+        span.set_attribute("attendance.month", month)
+        stored = self._load_closed_month(user_info.user_id, month)
+        span.set_attribute("attendance.local", stored is not None)
+        if stored is not None:
+            records, payload = stored
+        else:
+            snapshot = self._take_prefetched_attendance(month, user_info.user_id)
+            span.set_attribute("attendance.prefetched", snapshot is not None)
+            if snapshot is None:
+                snapshot, _, _ = self._refresh_snapshot(user_info.user_id, month)
+            records = snapshot.records
+            payload = snapshot.to_payload()
+
+        span.set_attribute("attendance.records", len(records))
+        if display and records:
+            records_to_show = [records[-1]] if last_only else records
+            self._display_attendance_table(records_to_show)
+
+        return payload
+
+    def _load_closed_month(
+        self, user_id: str, month: str
+    ) -> Optional[Tuple[List[AttendanceRecord], Dict[str, Any]]]:
+        if self.warehouse is None:
+            return None
+        try:
+            if not self.warehouse.is_closed(user_id, month):
+                return None
+            stored = self.warehouse.load_month(user_id, month)
+        except sqlite3.Error as e:
+            self.log.warning("读取本地考勤记录失败: {}", e)
+            return None
+        if stored is None:
+            return None
+
+        records, payload = stored
+        payload["dgpage"] = [record.to_dict() for record in records]
+        return records, payload
+
+    def sync_attendance_history(
+        self,
+        start_month: str,
+        end_month: str,
+        max_months: int = WAREHOUSE_MAX_SYNC_MONTHS,
+    ) -> int:
+        user_info = self.user_info
+        if not user_info or self.warehouse is None:
+            return 0
+
+        # 当前月之后没有记录；每个未结月份都是一次串行请求，限制一次同步的月份数
+        end_month = min(end_month, datetime.now().strftime("%Y-%m"))
+        months = months_between(start_month, end_month)
+        if len(months) > max_months:
+            raise ValueError(f"一次最多同步 {max_months} 个月，请缩小月份范围")
+
+        fetched = 0
+        for month in months:
+            if self.warehouse.is_closed(user_info.user_id, month):
+                continue
+            self._refresh_snapshot(user_info.user_id, month)
+            fetched += 1
+        return fetched
+
+    def query_attendance_history(
+        self, start_month: str, end_month: str, display: bool = True
+    ) -> Dict[str, Any]:
+        user_info = self.user_info
+        if not user_info:
+            self.log.error("请先登录")
+            return {"success": False, "error": "请先登录"}
+        if self.warehouse is None:
+            return {"success": False, "error": "本地考勤库未启用"}
+
+        end_month = min(end_month, datetime.now().strftime("%Y-%m"))
+        try:
+            fetched = self.sync_attendance_history(start_month, end_month)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        records = self.warehouse.records(
+            user_info.user_id, month_range(start_month)[0], month_range(end_month)[1]
+        )
+        self.log.debug("已同步 {} 个月份，本地查询到 {} 条记录", fetched, len(records))
+        if display and records:
+            self._display_attendance_table(records)
+        return {"success": True, "records": records, "synced_months": fetched}
+
+    def fetch_monthly_attendance(self, month: str) -> MonthSnapshot:
+        snapshot, _, _ = self.refresh_attendance_snapshot(month)
+        return snapshot
+
+    def refresh_attendance_snapshot(
+        self, month: str, revalidate: bool = False
+    ) -> Tuple[MonthSnapshot, List[AttendanceRecord], List[AttendanceRecord]]:
+        return self._refresh_snapshot(self.user_info.user_id, month, revalidate)
+
+    def _refresh_snapshot(
+        self, user_id: str, month: str, revalidate: bool = False
+    ) -> Tuple[MonthSnapshot, List[AttendanceRecord], List[AttendanceRecord]]:
+        previous = self.snapshot_store.get(user_id, month)
+
+        endpoint = ATTENDANCE_RECORDS_ENDPOINT
+        params = {"userId": user_id, "month": month}
+        headers = previous.conditional_headers() if previous else {}
+        if revalidate:
+            headers["Cache-Control"] = "no-cache"
 
         response = self._make_request_with_retry(
             "GET", endpoint, params=params, headers=headers
         )
-        result = response.json()
+        result = self.snapshot_store.apply_response(user_id, month, response)
+        self._store_in_warehouse(user_id, month, result[0])
+        return result
 
-        records = result["dgpage"]
-        if records:
-            records_to_show = [records[-1]] if last_only else records
-            self._display_attendance_table(records_to_show)
+    def _store_in_warehouse(
+        self, user_id: str, month: str, snapshot: MonthSnapshot
+    ) -> None:
+        if self.warehouse is None:
+            return
+        user_info = self.user_info
+        user_name = None
+        if user_info and user_info.user_id == user_id:
+            user_name = user_info.user_name
+        try:
+            self.warehouse.store_month(user_id, month, snapshot, user_name)
+        except sqlite3.Error as e:
+            self.log.warning("写入本地考勤库失败: {}", e)
 
-        return result
+    def get_latest_attendance(
+        self, month: Optional[str] = None, display: bool = True
+    ) -> Dict[str, Any]:
+        user_info = self.user_info
+        if not user_info:
+            self.log.error("请先登录")
+            return {"success": False, "error": "请先登录"}
+
+        if not month:
+            month = datetime.now().strftime("%Y-%m")
+
+        snapshot, new_records, changed_records = self._refresh_snapshot(
+            user_info.user_id, month
+        )
+        if new_records or changed_records:
+            self.log.debug(
+                "考勤记录变化: 新增 {} 条，更新 {} 条",
+                len(new_records),
+                len(changed_records),
+            )
+
+        latest = snapshot.latest
+        if display and latest:
+            self._display_attendance_table([latest])
+
+        return {
+            "success": True,
+            "month": month,
+            "latest": latest,
+            "new_records": new_records,
+            "changed_records": changed_records,
+        }
+
+    def set_prefetched_attendance(self, month: str, future: Future) -> None:
+        user_info = self.user_info
+        user_id = user_info.user_id if user_info else None
+        with self._lock:
+            self._prefetched_attendance[month] = (time.monotonic(), user_id, future)
+
+    def has_prefetched_attendance(self, month: str) -> bool:
+        with self._lock:
+            entry = self._prefetched_attendance.get(month)
+        return entry is not None and time.monotonic() - entry[0] <= PREFETCH_TTL
+
+    def discard_prefetched_attendance(self) -> None:
+        with self._lock:
+            entries = list(self._prefetched_attendance.values())
+            self._prefetched_attendance.clear()
+        for _, _, future in entries:
+            future.cancel()
+
+    def _take_prefetched_attendance(
+        self, month: str, user_id: Optional[str] = None
+    ) -> Optional[MonthSnapshot]:
+        with self._lock:
+            entry = self._prefetched_attendance.pop(month, None)
+        if entry is None:
+            return None
+
+        created_at, prefetched_user_id, future = entry
+        if time.monotonic() - created_at > PREFETCH_TTL or (
+            user_id is not None and prefetched_user_id != user_id
+        ):
+            future.cancel()
+            return None
+
+        try:
+            return future.result()
+        except Exception as e:
+            self.log.debug("预取考勤记录失败，重新查询: {}", e)
+            return None
+
+    def purge_cached_responses(self) -> None:
+        user_info = self.user_info
+        if self.http_cache is not None and user_info is not None:
+            self.http_cache.purge_user(user_info.user_id)
 
     def close(self) -> None:
-        if hasattr(self, "session"):
-            self.session.close()
+        self.discard_prefetched_attendance()
+        if hasattr(self, "transport"):
+            self.transport.close()
@@ -2,16 +2,38 @@ from typing import Any, Dict, Optional, Tuple
 
 from inspur.config_manager import ConfigManager
 from inspur.inspur_client import InspurClient, md5_encrypt
+from inspur.prefetcher import Prefetcher
 from utils.logger import get_logger
+from utils.tracing import current_span, traced
 
 logger = get_logger(__name__)
 
 
 class LoginManager:
-    def __init__(self, config_manager: ConfigManager):
+    def __init__(
+        self, config_manager: ConfigManager, prefetcher: Optional[Prefetcher] = None
+    ):
         self.config_manager = config_manager
+        self.prefetcher = prefetcher
         self.max_login_attempts = 3
 
+    def create_client(
+        self, config: Dict[str, Any], client_uuid: Optional[str] = None
+    ) -> InspurClient:
+        warm_client = self.prefetcher.take_warm_client() if self.prefetcher else None
+        if warm_client is None:
+            return InspurClient(
+                base_url=config["base_url"],
+                base_urls=config["base_urls"],
+                random_radius_meters=config["random_radius_meters"],
+                client_uuid=client_uuid,
+            )
+
+        warm_client.random_radius_meters = config["random_radius_meters"]
+        warm_client.client_uuid = client_uuid
+        return warm_client
+
+    @traced("login")
     def login_with_credentials(
         self, phone: str, password: str, is_encrypted: bool = False
     ) -> Dict[str, Any]:
@@ -22,10 +44,7 @@ class LoginManager:
 
             client_uuid = self.config_manager.get_client_uuid(encrypted_phone)
 
-            temp_client = InspurClient(
-                random_radius_meters=config["random_radius_meters"],
-                client_uuid=client_uuid,
-            )
+            temp_client = self.create_client(config, client_uuid)
 
             login_method = (
                 temp_client.login_with_encrypted_credentials
@@ -33,6 +52,7 @@ class LoginManager:
                 else temp_client.login
             )
             login_result = login_method(phone, password, silent=True)
+            current_span().set_attribute("login.success", login_result["success"])
 
             if login_result["success"]:
                 login_result["encrypted_phone"] = encrypted_phone
@@ -71,7 +91,7 @@ class LoginManager:
                 # 获取用户名
                 logged_in_client = login_result["logged_in_inspur"]
                 actual_username = (
-                    logged_in_client.user_info["user_name"]
+                    logged_in_client.user_info.user_name
                     if (logged_in_client and logged_in_client.user_info)
                     else phone
                 )
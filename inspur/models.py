@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+RECORD_FIELDS = ("SIGNTIME", "SIGNINTIME", "SIGNOUTTIME")
+
+
+class UserInfo:
+    __slots__ = ("phone", "user_id", "user_name")
+
+    def __init__(self, phone: str, user_id: str, user_name: str):
+        self.phone = phone
+        self.user_id = user_id
+        self.user_name = user_name
+
+    @classmethod
+    def from_server(cls, data: Dict[str, Any]) -> "UserInfo":
+        return cls(data["PHONE"], data["USER_ID"], data["USER_NAME"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "phone": self.phone,
+            "user_id": self.user_id,
+            "user_name": self.user_name,
+        }
+
+    def __repr__(self) -> str:
+        return f"UserInfo(user_id={self.user_id!r}, user_name={self.user_name!r})"
+
+
+class AttendanceSite:
+    __slots__ = ("id", "latitude", "longitude", "address")
+
+    def __init__(self, id: str, latitude: Any, longitude: Any, address: str):
+        self.id = id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.address = address
+
+    @classmethod
+    def from_server(cls, data: Dict[str, Any]) -> "AttendanceSite":
+        return cls(
+            str(data["id"]), data["latitude"], data["longitude"], data["address"]
+        )
+
+    @classmethod
+    def from_config(cls, address: str, data: Dict[str, Any]) -> "AttendanceSite":
+        return cls(data["id"], data["latitude"], data["longitude"], address)
+
+    def to_config(self) -> Dict[str, Any]:
+        return {"id": self.id, "latitude": self.latitude, "longitude": self.longitude}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "address": self.address,
+        }
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, AttendanceSite):
+            return NotImplemented
+        return (
+            self.id == other.id
+            and self.latitude == other.latitude
+            and self.longitude == other.longitude
+            and self.address == other.address
+        )
+
+    def __repr__(self) -> str:
+        return f"AttendanceSite(id={self.id!r}, address={self.address!r})"
+
+
+def sites_to_config(sites: Iterable[AttendanceSite]) -> Dict[str, Dict[str, Any]]:
+    return {site.address: site.to_config() for site in sites}
+
+
+class ClientState:
+    __slots__ = ("user_info", "attendance_site", "client_uuid")
+
+    def __init__(
+        self,
+        user_info: Optional[UserInfo] = None,
+        attendance_site: Optional[AttendanceSite] = None,
+        client_uuid: Optional[str] = None,
+    ):
+        object.__setattr__(self, "user_info", user_info)
+        object.__setattr__(self, "attendance_site", attendance_site)
+        object.__setattr__(self, "client_uuid", client_uuid)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("ClientState 不可修改，请使用 replace()")
+
+    def replace(self, **changes: Any) -> "ClientState":
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return ClientState(**values)
+
+    def __repr__(self) -> str:
+        return (
+            f"ClientState(user_info={self.user_info!r}, "
+            f"attendance_site={self.attendance_site!r}, "
+            f"client_uuid={self.client_uuid!r})"
+        )
+
+
+class AttendanceRecord:
+    __slots__ = ("sign_time", "sign_in_time", "sign_out_time", "extra")
+
+    def __init__(
+        self,
+        sign_time: str,
+        sign_in_time: str = "",
+        sign_out_time: str = "",
+        extra: Optional[Dict[str, Any]] = None,
+    ):
+        self.sign_time = sign_time
+        self.sign_in_time = sign_in_time
+        self.sign_out_time = sign_out_time
+        self.extra = extra
+
+    @classmethod
+    def from_server(cls, data: Dict[str, Any]) -> "AttendanceRecord":
+        extra = None
+        if len(data) > len(RECORD_FIELDS):
+            extra = {k: v for k, v in data.items() if k not in RECORD_FIELDS}
+        return cls(
+            str(data.get("SIGNTIME", "")),
+            data.get("SIGNINTIME") or "",
+            data.get("SIGNOUTTIME") or "",
+            extra,
+        )
+
+    @property
+    def signed_in(self) -> bool:
+        return bool(self.sign_in_time) and self.sign_in_time != "-"
+
+    @property
+    def signed_out(self) -> bool:
+        return bool(self.sign_out_time) and self.sign_out_time != "-"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = dict(self.extra) if self.extra else {}
+        data["SIGNTIME"] = self.sign_time
+        data["SIGNINTIME"] = self.sign_in_time
+        data["SIGNOUTTIME"] = self.sign_out_time
+        return data
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, AttendanceRecord):
+            return NotImplemented
+        return (
+            self.sign_time == other.sign_time
+            and self.sign_in_time == other.sign_in_time
+            and self.sign_out_time == other.sign_out_time
+            and self.extra == other.extra
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"AttendanceRecord(sign_time={self.sign_time!r}, "
+            f"sign_in_time={self.sign_in_time!r}, sign_out_time={self.sign_out_time!r})"
+        )
+
+
+def find_confirmed_record(
+    records: List[AttendanceRecord],
+    is_checkout: bool,
+    started_at: datetime,
+    clock_skew_seconds: float = 0,
+) -> Optional[AttendanceRecord]:
+    today = started_at.strftime("%Y-%m-%d")
+    earliest = max(
+        started_at - timedelta(seconds=clock_skew_seconds),
+        started_at.replace(hour=0, minute=0, second=0, microsecond=0),
+    ).strftime("%H:%M:%S")
+
+    for record in reversed(records):
+        if not record.sign_time.startswith(today):
+            continue
+
+        if not is_checkout:
+            # 服务端只保留当天第一次签到时间，当天已有签到即视为确认
+            return record if record.signed_in else None
+        # 签退时间随最后一次签退更新，只认本次操作之后（允许时钟误差）的签退
+        if not record.signed_out:
+            return None
+        if record.sign_out_time < earliest[: len(record.sign_out_time)]:
+            return None
+        return record
+    return None
@@ -0,0 +1,210 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.constants import OUTBOX_PATH, OUTBOX_SYNCHRONOUS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_DELIVERED = "delivered"
+STATUS_DUPLICATE = "duplicate"
+STATUS_SUPERSEDED = "superseded"
+STATUS_EXPIRED = "expired"
+STATUS_REJECTED = "rejected"
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    action_type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (status, user_id, id);
+"""
+
+
+class OutboxEntry:
+    __slots__ = (
+        "id",
+        "idempotency_key",
+        "user_id",
+        "action_type",
+        "payload",
+        "created_at",
+        "status",
+        "attempts",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        idempotency_key: str,
+        user_id: str,
+        action_type: str,
+        payload: Dict[str, Any],
+        created_at: float,
+        status: str = STATUS_PENDING,
+        attempts: int = 0,
+    ):
+        self.id = id
+        self.idempotency_key = idempotency_key
+        self.user_id = user_id
+        self.action_type = action_type
+        self.payload = payload
+        self.created_at = created_at
+        self.status = status
+        self.attempts = attempts
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "OutboxEntry":
+        return cls(
+            row["id"],
+            row["idempotency_key"],
+            row["user_id"],
+            row["action_type"],
+            json.loads(row["payload"]),
+            row["created_at"],
+            row["status"],
+            row["attempts"],
+        )
+
+    @property
+    def is_checkout(self) -> bool:
+        return self.action_type == "签退"
+
+    @property
+    def created_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "idempotency_key": self.idempotency_key,
+            "action_type": self.action_type,
+            "created_at": self.created_datetime.strftime("%Y-%m-%d %H:%M:%S"),
+            "status": self.status,
+            "attempts": self.attempts,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"OutboxEntry(id={self.id!r}, action_type={self.action_type!r}, "
+            f"status={self.status!r})"
+        )
+
+
+class AttendanceOutbox:
+    def __init__(self, path: str = OUTBOX_PATH, synchronous: str = OUTBOX_SYNCHRONOUS):
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"不支持的 synchronous 模式: {synchronous}")
+        self.path = path
+        self.synchronous = synchronous
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def enqueue(
+        self, user_id: str, action_type: str, payload: Dict[str, Any]
+    ) -> OutboxEntry:
+        now = time.time()
+        entry = OutboxEntry(0, uuid.uuid4().hex, user_id, action_type, payload, now)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # 同一用户同一动作只保留最新的一条待提交记录
+                conn.execute(
+                    "UPDATE outbox SET status = ?, updated_at = ? "
+                    "WHERE status = ? AND user_id = ? AND action_type = ?",
+                    (STATUS_SUPERSEDED, now, STATUS_PENDING, user_id, action_type),
+                )
+                cursor = conn.execute(
+                    "INSERT INTO outbox (idempotency_key, user_id, action_type, "
+                    "payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        entry.idempotency_key,
+                        user_id,
+                        action_type,
+                        json.dumps(payload, ensure_ascii=False),
+                        now,
+                    ),
+                )
+            entry.id = cursor.lastrowid
+        logger.debug("考勤请求已写入离线队列: {}", entry.idempotency_key)
+        return entry
+
+    def pending(self, user_id: Optional[str] = None) -> List[OutboxEntry]:
+        query = "SELECT * FROM outbox WHERE status = ?"
+        params: List[Any] = [STATUS_PENDING]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        with self._lock:
+            rows = self._connection().execute(query + " ORDER BY id", params).fetchall()
+        return [OutboxEntry.from_row(row) for row in rows]
+
+    def mark(self, entry: OutboxEntry, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._connection().execute(
+                "UPDATE outbox SET status = ?, last_error = ?, updated_at = ? "
+                "WHERE id = ? AND status = ?",
+                (status, error, time.time(), entry.id, STATUS_PENDING),
+            )
+        entry.status = status
+
+    def record_attempt(self, entry: OutboxEntry, error: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ?, "
+                "updated_at = ? WHERE id = ?",
+                (error, time.time(), entry.id),
+            )
+        entry.attempts += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_default_outbox: Optional[AttendanceOutbox] = None
+_default_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> AttendanceOutbox:
+    global _default_outbox
+    with _default_outbox_lock:
+        if _default_outbox is None:
+            _default_outbox = AttendanceOutbox()
+        return _default_outbox
@@ -0,0 +1,132 @@
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from inspur.inspur_client import InspurClient
+from inspur.models import find_confirmed_record
+from inspur.outbox import (STATUS_DELIVERED, STATUS_DUPLICATE, STATUS_EXPIRED,
+                           STATUS_REJECTED, AttendanceOutbox, OutboxEntry,
+                           get_outbox)
+from utils.constants import OUTBOX_DRAIN_INTERVAL, VERIFY_CLOCK_SKEW_SECONDS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class OutboxDrainer:
+    def __init__(
+        self,
+        outbox: Optional[AttendanceOutbox] = None,
+        interval: float = OUTBOX_DRAIN_INTERVAL,
+    ):
+        self.outbox = outbox or get_outbox()
+        self.interval = interval
+        self._clients: Dict[str, Tuple[InspurClient, Optional[threading.Lock]]] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._drain_loop, name="inspur-outbox", daemon=True
+            )
+            self._thread.start()
+
+    def register(
+        self, client: Optional[InspurClient], lock: Optional[threading.Lock] = None
+    ) -> None:
+        if client is None or not client.user_info:
+            return
+        with self._lock:
+            self._clients[client.user_info.user_id] = (client, lock)
+        self._wakeup.set()
+
+    def unregister(self, client: InspurClient) -> None:
+        if not client.user_info:
+            return
+        with self._lock:
+            registered = self._clients.get(client.user_info.user_id)
+            if registered and registered[0] is client:
+                del self._clients[client.user_info.user_id]
+
+    def _drain_loop(self) -> None:
+        while not self._stop_event.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stop_event.is_set():
+                return
+            with self._lock:
+                clients = list(self._clients.values())
+            for client, lock in clients:
+                try:
+                    if lock is None:
+                        self.drain(client)
+                    else:
+                        with lock:
+                            self.drain(client)
+                except Exception as e:
+                    logger.warning("离线队列提交出错: {}", e)
+
+    def drain(self, client: InspurClient) -> int:
+        if not client.user_info:
+            return 0
+        entries = self.outbox.pending(client.user_info.user_id)
+        if not entries:
+            return 0
+
+        delivered = 0
+        today = datetime.now().strftime("%Y-%m-%d")
+        for entry in entries:
+            created_at = entry.created_datetime
+            if created_at.strftime("%Y-%m-%d") != today:
+                self.outbox.mark(entry, STATUS_EXPIRED)
+                logger.warning(
+                    "离线{}请求已过期，未提交（{}）",
+                    entry.action_type,
+                    created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                )
+                continue
+
+            try:
+                if self._already_recorded(client, entry, created_at):
+                    self.outbox.mark(entry, STATUS_DUPLICATE)
+                    logger.info("离线{}请求已在服务端生效，跳过提交", entry.action_type)
+                    continue
+                result = client.submit_attendance(entry.payload)
+            except requests.exceptions.RequestException as e:
+                # 网络仍不可用时保持顺序，等待下一轮
+                self.outbox.record_attempt(entry, str(e))
+                logger.debug("离线队列暂不可提交: {}", e)
+                break
+
+            if result.get("success"):
+                self.outbox.mark(entry, STATUS_DELIVERED)
+                delivered += 1
+                logger.info("✓ 离线{}请求已提交", entry.action_type)
+            else:
+                message = result.get("message", "未知错误")
+                self.outbox.mark(entry, STATUS_REJECTED, message)
+                logger.error("离线{}请求被拒绝: {}", entry.action_type, message)
+        return delivered
+
+    def _already_recorded(
+        self, client: InspurClient, entry: OutboxEntry, created_at: datetime
+    ) -> bool:
+        snapshot, _, _ = client.refresh_attendance_snapshot(
+            created_at.strftime("%Y-%m"), revalidate=True
+        )
+        record = find_confirmed_record(
+            snapshot.records, entry.is_checkout, created_at, VERIFY_CLOCK_SKEW_SECONDS
+        )
+        return record is not None
+
+    def shutdown(self) -> None:
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
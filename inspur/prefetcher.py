@@ -0,0 +1,85 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from inspur.config_manager import ConfigManager
+from inspur.inspur_client import InspurClient
+from utils.constants import PREFETCH_MAX_WORKERS, REQUEST_TIMEOUT
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Prefetcher:
+    def __init__(
+        self, config_manager: ConfigManager, max_workers: int = PREFETCH_MAX_WORKERS
+    ):
+        self.config_manager = config_manager
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="inspur-prefetch"
+        )
+        self._warm_client: Optional[Future] = None
+
+    def start_warmup(self) -> None:
+        if self._warm_client is None:
+            self._warm_client = self._executor.submit(self._build_warm_client)
+        self._executor.submit(self._preload_config)
+
+    def take_warm_client(self) -> Optional[InspurClient]:
+        future, self._warm_client = self._warm_client, None
+        if future is None:
+            return None
+
+        try:
+            return future.result(timeout=REQUEST_TIMEOUT)
+        except Exception as e:
+            logger.debug("预热客户端不可用: {}", e)
+            return None
+
+    def prefetch_monthly_attendance(
+        self, client: Optional[InspurClient], month: Optional[str] = None
+    ) -> None:
+        if client is None or not client.user_info:
+            return
+
+        month = month or datetime.now().strftime("%Y-%m")
+        if client.has_prefetched_attendance(month):
+            return
+
+        future = self._executor.submit(client.fetch_monthly_attendance, month)
+        client.set_prefetched_attendance(month, future)
+
+    def _build_warm_client(self) -> InspurClient:
+        config = self.config_manager.load_config()
+        client = InspurClient(
+            base_url=config["base_url"],
+            base_urls=config["base_urls"],
+            random_radius_meters=config["random_radius_meters"],
+        )
+        client.warm_up_connection()
+        return client
+
+    def _preload_config(self) -> None:
+        try:
+            self.config_manager.load_config()
+            self.config_manager.get_all_users()
+            self._preload_attendance_sites()
+        except Exception as e:
+            logger.debug("预加载配置失败: {}", e)
+
+    def _preload_attendance_sites(self) -> None:
+        try:
+            self.config_manager.load_attendance_sites()
+        except Exception as e:
+            logger.debug("预加载考勤点失败: {}", e)
+
+    def shutdown(self) -> None:
+        future, self._warm_client = self._warm_client, None
+        if (
+            future is not None
+            and future.done()
+            and not future.cancelled()
+            and future.exception() is None
+        ):
+            future.result().close()
+        self._executor.shutdown(wait=False)
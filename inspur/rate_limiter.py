@@ -0,0 +1,121 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from inspur.deadline import DeadlineExceededError, current_deadline
+from utils.constants import RATE_LIMIT_BURST, RATE_LIMIT_PER_SECOND
+from utils.logger import get_logger
+from utils.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        rate: Optional[float] = RATE_LIMIT_PER_SECOND,
+        burst: Optional[float] = RATE_LIMIT_BURST,
+        endpoint_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.configure(rate, burst, endpoint_limits)
+
+    def configure(
+        self,
+        rate: Optional[float],
+        burst: Optional[float],
+        endpoint_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+    ) -> None:
+        with self._lock:
+            self.rate = rate
+            self.burst = burst or rate
+            self.endpoint_limits = dict(endpoint_limits or {})
+            self._buckets.clear()
+
+    def _bucket(
+        self, base_url: str, endpoint: str, rate: float, burst: float
+    ) -> TokenBucket:
+        key = (base_url, endpoint)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, max(burst, 1))
+            return bucket
+
+    def acquire(self, base_url: str, endpoint: str) -> float:
+        buckets = []
+        if self.rate:
+            buckets.append(self._bucket(base_url, "", self.rate, self.burst))
+        if endpoint in self.endpoint_limits:
+            rate, burst = self.endpoint_limits[endpoint]
+            if rate:
+                buckets.append(self._bucket(base_url, endpoint, rate, burst))
+        if not buckets:
+            return 0.0
+
+        wait = max(bucket.reserve() for bucket in buckets)
+        deadline = current_deadline()
+        if deadline is not None and wait > deadline.remaining():
+            for bucket in buckets:
+                bucket.cancel()
+            get_metrics().increment(
+                "rate_limit.rejected", base_url=base_url, endpoint=endpoint
+            )
+            raise DeadlineExceededError(f"限流等待超出时间预算: {endpoint}")
+
+        if wait > 0:
+            logger.debug("限流等待 {:.3f} 秒: {}", wait, endpoint)
+            time.sleep(wait)
+        get_metrics().observe(
+            "rate_limit.wait_seconds", wait, base_url=base_url, endpoint=endpoint
+        )
+        return wait
+
+
+_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    return _limiter
+
+
+def configure_rate_limits(settings: Optional[Dict[str, Any]]) -> None:
+    settings = settings or {}
+    endpoint_limits = {
+        endpoint: (
+            limit.get("requests_per_second"),
+            limit.get("burst") or limit.get("requests_per_second"),
+        )
+        for endpoint, limit in (settings.get("endpoints") or {}).items()
+    }
+    _limiter.configure(
+        settings.get("requests_per_second", RATE_LIMIT_PER_SECOND),
+        settings.get("burst", RATE_LIMIT_BURST),
+        endpoint_limits,
+    )
@@ -0,0 +1,60 @@
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Any],
+        wait_timeout: Optional[float] = None,
+    ) -> Tuple[Any, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not is_leader:
+            if not call.done.wait(wait_timeout):
+                raise TimeoutError("等待并发请求超时")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+def clone_response(response: requests.Response) -> requests.Response:
+    cloned = copy.copy(response)
+    cloned.headers = CaseInsensitiveDict(response.headers)
+    return cloned
@@ -0,0 +1,99 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from inspur.config_manager import ConfigManager
+from inspur.inspur_client import InspurClient
+from inspur.models import AttendanceSite, sites_to_config
+from utils.constants import DISCOVERY_MAX_WORKERS
+from utils.logger import get_logger
+from utils.tracing import traced
+
+logger = get_logger(__name__)
+
+Coordinate = Tuple[float, float]
+
+
+def parse_coordinate(text: str) -> Coordinate:
+    parts = text.split(",")
+    if len(parts) != 2:
+        raise ValueError(f"坐标格式错误，请使用 经度,纬度 格式: {text}")
+    return float(parts[0].strip()), float(parts[1].strip())
+
+
+class SiteDiscoverer:
+    def __init__(
+        self,
+        client: InspurClient,
+        config_manager: ConfigManager,
+        max_workers: int = DISCOVERY_MAX_WORKERS,
+    ):
+        self.client = client
+        self.config_manager = config_manager
+        self.max_workers = max_workers
+
+    def seed_coordinates(self) -> List[Coordinate]:
+        # 默认坐标加上已保存考勤点的坐标，用于刷新已知区域
+        config = self.config_manager.load_config()
+        seeds = []
+        if config["default_longitude"] and config["default_latitude"]:
+            seeds.append((config["default_longitude"], config["default_latitude"]))
+        for site in (config["attendance_sites"] or {}).values():
+            seeds.append((float(site["longitude"]), float(site["latitude"])))
+        return seeds
+
+    @traced("discovery.discover")
+    def discover(
+        self, coordinates: List[Coordinate]
+    ) -> Tuple[List[AttendanceSite], List[Tuple[Coordinate, str]]]:
+        coordinates = list(dict.fromkeys(coordinates))
+        if not coordinates:
+            return [], []
+
+        # 各工作线程共用同一个客户端，传输层为每个并发请求分配独立的 Session
+        workers = max(1, min(self.max_workers, len(coordinates)))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="inspur-discovery"
+        ) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self.client.fetch_attendance_sites,
+                    lng,
+                    lat,
+                )
+                for lng, lat in coordinates
+            ]
+
+        # 按坐标顺序合并，同一考勤点（相同 id）只保留第一次出现的结果
+        sites: Dict[str, AttendanceSite] = {}
+        failures = []
+        for coordinate, future in zip(coordinates, futures):
+            try:
+                for site in future.result():
+                    sites.setdefault(site.id, site)
+            except Exception as e:
+                failures.append((coordinate, str(e)))
+                logger.warning("查询坐标 {},{} 附近的考勤点失败: {}", *coordinate, e)
+        return list(sites.values()), failures
+
+    def discover_and_merge(
+        self, coordinates: Optional[List[Coordinate]] = None
+    ) -> Tuple[int, int, List[AttendanceSite]]:
+        started = time.perf_counter()
+        coordinates = coordinates or self.seed_coordinates()
+        sites, failures = self.discover(coordinates)
+        added, updated = self.config_manager.merge_attendance_sites(
+            sites_to_config(sites)
+        )
+        logger.info(
+            "查询 {} 个坐标，用时 {:.2f} 秒：发现 {} 个考勤点，新增 {} 个，更新 {} 个，失败 {} 个坐标",
+            len(set(coordinates)),
+            time.perf_counter() - started,
+            len(sites),
+            added,
+            updated,
+            len(failures),
+        )
+        return added, updated, sites
@@ -0,0 +1,419 @@
+import base64
+import gzip
+import http.client
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils.constants import CASSETTE_REPLAY_SPEED, HTTP_TRANSPORT
+from utils.logger import get_logger
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = get_logger(__name__)
+
+CASSETTE_VERSION = 1
+# 录制时不保存的响应头
+CASSETTE_SKIPPED_HEADERS = (
+    "set-cookie",
+    "content-encoding",
+    "content-length",
+    "transfer-encoding",
+)
+
+
+def build_response(
+    method: str,
+    url: str,
+    status: int,
+    body: bytes,
+    headers: Optional[Dict[str, str]] = None,
+    elapsed: float = 0.0,
+    reason: str = "",
+) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason or http.client.responses.get(status, "")
+    response.url = url
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.elapsed = timedelta(seconds=elapsed)
+    response._content = body
+    response.request = requests.Request(method, url).prepare()
+    return response
+
+
+class Transport(ABC):
+    name = "base"
+
+    def __init__(self) -> None:
+        self.headers: CaseInsensitiveDict = CaseInsensitiveDict()
+
+    @abstractmethod
+    def request(
+        self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs
+    ) -> requests.Response: ...
+
+    def close(self) -> None:
+        pass
+
+
+class RequestsTransport(Transport):
+    name = "requests"
+
+    # requests.Session 不是线程安全的：每个请求从空闲池中借用一个 Session，
+    # 用完归还，并发请求数决定池的大小；所有 Session 共享同一份请求头和 Cookie
+    def __init__(self) -> None:
+        self.headers = requests.utils.default_headers()
+        self.cookies = requests.cookies.RequestsCookieJar()
+        self._idle: List[requests.Session] = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _checkout(self) -> requests.Session:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        session = requests.Session()
+        session.headers = self.headers
+        session.cookies = self.cookies
+        return session
+
+    def _checkin(self, session: requests.Session) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.append(session)
+                return
+        session.close()
+
+    def request(
+        self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs
+    ) -> requests.Response:
+        session = self._checkout()
+        try:
+            return session.request(method, url, headers=headers, **kwargs)
+        finally:
+            self._checkin(session)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            session.close()
+
+
+class HttpxTransport(Transport):
+    name = "httpx"
+
+    def __init__(self, http2: bool = True):
+        if httpx is None:
+            raise ImportError("使用 httpx 传输需要先安装 httpx: uv pip install 'httpx[http2]'")
+        super().__init__()
+        try:
+            self.client = httpx.Client(http2=http2)
+        except ImportError:
+            logger.warning("未安装 h2，httpx 传输回退为 HTTP/1.1")
+            self.client = httpx.Client()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        data: Any = None,
+        json: Any = None,
+        timeout: Any = None,
+        allow_redirects: bool = True,
+        **kwargs,
+    ) -> requests.Response:
+        merged_headers = dict(self.headers)
+        merged_headers.update(headers or {})
+        if isinstance(timeout, tuple):
+            connect_timeout, read_timeout = timeout
+            timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+
+        try:
+            response = self.client.request(
+                method,
+                url,
+                headers=merged_headers,
+                params=params,
+                data=data,
+                json=json,
+                timeout=timeout,
+                follow_redirects=allow_redirects,
+            )
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(str(e))
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(str(e))
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+        return build_response(
+            method,
+            str(response.url),
+            response.status_code,
+            response.content,
+            {k: v for k, v in response.headers.items() if k.lower() != "content-encoding"},
+            response.elapsed.total_seconds(),
+            response.reason_phrase,
+        )
+
+    def close(self) -> None:
+        self.client.close()
+
+
+FakeResult = Union[Dict[str, Any], List[Any], Tuple[int, Any]]
+FakeHandler = Callable[[str, str, Dict[str, Any]], FakeResult]
+
+
+class FakeTransport(Transport):
+    name = "fake"
+
+    def __init__(
+        self,
+        routes: Optional[Dict[Tuple[str, str], Union[FakeResult, FakeHandler]]] = None,
+        latency: float = 0.0,
+    ):
+        super().__init__()
+        self.routes = dict(routes or {})
+        self.latency = latency
+        self.calls: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def add_route(
+        self, method: str, path: str, result: Union[FakeResult, FakeHandler]
+    ) -> None:
+        self.routes[(method.upper(), path)] = result
+
+    def request(
+        self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs
+    ) -> requests.Response:
+        path = urlsplit(url).path
+        with self._lock:
+            self.calls.append((method, path))
+        if self.latency:
+            time.sleep(self.latency)
+
+        result = self.routes.get((method.upper(), path))
+        if callable(result):
+            result = result(method, url, kwargs)
+        if result is None:
+            status, payload = 404, {}
+        elif isinstance(result, tuple):
+            status, payload = result
+        else:
+            status, payload = 200, result
+
+        if isinstance(payload, bytes):
+            body = payload
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        return build_response(
+            method,
+            url,
+            status,
+            body,
+            {"Content-Type": "application/json;charset=UTF-8"},
+            self.latency,
+        )
+
+
+def interaction_key(method: str, url: str) -> str:
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} {parts.path}?{query}"
+
+
+def _request_url(url: str, params: Optional[Dict[str, Any]]) -> str:
+    if not params:
+        return url
+    return requests.Request("GET", url, params=params).prepare().url
+
+
+class Cassette:
+    def __init__(self, path: str):
+        self.path = path
+        self._interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+        self._file: Optional[gzip.GzipFile] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        cassette = cls(path)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if "key" not in item:
+                    continue
+                cassette._interactions.setdefault(item["key"], []).append(item)
+        logger.info("已加载回放文件 {}，共 {} 个请求", path, len(cassette))
+        return cassette
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._interactions.values())
+
+    def record(self, key: str, response: requests.Response) -> None:
+        body = response.content or b""
+        try:
+            text, body_encoding = body.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            text, body_encoding = base64.b64encode(body).decode("ascii"), "base64"
+        item = {
+            "key": key,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                k: v
+                for k, v in response.headers.items()
+                if k.lower() not in CASSETTE_SKIPPED_HEADERS
+            },
+            "body": text,
+            "body_encoding": body_encoding,
+            "elapsed": round(response.elapsed.total_seconds(), 6),
+        }
+        line = json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = gzip.open(self.path, "wb")
+                header = {"version": CASSETTE_VERSION, "recorded_at": time.time()}
+                self._file.write((json.dumps(header) + "\n").encode("utf-8"))
+            self._file.write(line.encode("utf-8"))
+            self._file.flush()
+
+    def next_interaction(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            items = self._interactions.get(key)
+            if not items:
+                return None
+            position = self._positions.get(key, 0)
+            # 回放次数超过录制次数时重复最后一次响应
+            self._positions[key] = min(position + 1, len(items) - 1)
+            return items[position]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RecordingTransport(Transport):
+    def __init__(self, inner: Transport, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+        self.headers = inner.headers
+        self.name = f"record+{inner.name}"
+
+    def request(
+        self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs
+    ) -> requests.Response:
+        response = self.inner.request(method, url, headers=headers, **kwargs)
+        key = interaction_key(method, _request_url(url, kwargs.get("params")))
+        self.cassette.record(key, response)
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class ReplayTransport(Transport):
+    name = "replay"
+
+    def __init__(self, cassette: Cassette, speed: float = CASSETTE_REPLAY_SPEED):
+        super().__init__()
+        self.cassette = cassette
+        self.speed = speed
+
+    def request(
+        self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs
+    ) -> requests.Response:
+        full_url = _request_url(url, kwargs.get("params"))
+        key = interaction_key(method, full_url)
+        item = self.cassette.next_interaction(key)
+        if item is None:
+            raise requests.exceptions.ConnectionError(f"回放文件中没有匹配的请求: {key}")
+
+        delay = item["elapsed"] / self.speed if self.speed > 0 else 0.0
+        timeout = kwargs.get("timeout")
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.exceptions.ReadTimeout(f"回放响应超时: {key}")
+        if delay:
+            time.sleep(delay)
+
+        if item["body_encoding"] == "base64":
+            body = base64.b64decode(item["body"])
+        else:
+            body = item["body"].encode("utf-8")
+        return build_response(
+            method,
+            full_url,
+            item["status"],
+            body,
+            item["headers"],
+            item["elapsed"],
+            item["reason"],
+        )
+
+
+_transport_name = HTTP_TRANSPORT
+_record_cassette: Optional[Cassette] = None
+_replay_cassette: Optional[Cassette] = None
+_replay_speed = CASSETTE_REPLAY_SPEED
+
+
+def configure_transport(
+    name: Optional[str] = None,
+    record_path: Optional[str] = None,
+    replay_path: Optional[str] = None,
+    replay_speed: float = CASSETTE_REPLAY_SPEED,
+) -> None:
+    global _transport_name, _record_cassette, _replay_cassette, _replay_speed
+    if record_path and replay_path:
+        raise ValueError("不能同时录制和回放")
+    close_transports()
+    _transport_name = name or HTTP_TRANSPORT
+    _record_cassette = Cassette(record_path) if record_path else None
+    _replay_cassette = Cassette.load(replay_path) if replay_path else None
+    _replay_speed = replay_speed
+    if record_path:
+        logger.info("正在录制请求到 {}", record_path)
+
+
+def create_transport() -> Transport:
+    if _replay_cassette is not None:
+        return ReplayTransport(_replay_cassette, _replay_speed)
+
+    if _transport_name == "httpx":
+        transport: Transport = HttpxTransport()
+    elif _transport_name == "requests":
+        transport = RequestsTransport()
+    else:
+        raise ValueError(f"不支持的传输方式: {_transport_name}")
+
+    if _record_cassette is not None:
+        return RecordingTransport(transport, _record_cassette)
+    return transport
+
+
+def close_transports() -> None:
+    if _record_cassette is not None:
+        _record_cassette.close()
@@ -0,0 +1,181 @@
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from inspur.config_manager import ConfigManager
+from inspur.deadline import deadline_scope
+from inspur.inspur_client import md5_encrypt
+from inspur.login_manager import LoginManager
+from utils.common_utils import mask_phone
+from utils.constants import IMPORT_MAX_WORKERS, REPORT_USER_DEADLINE
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ImportedUser:
+    __slots__ = (
+        "line",
+        "phone",
+        "password",
+        "name",
+        "encrypted_phone",
+        "encrypted_password",
+        "error",
+    )
+
+    def __init__(self, line: int, phone: str, password: str = "", name: str = ""):
+        self.line = line
+        self.phone = phone
+        self.password = password
+        self.name = name
+        self.encrypted_phone = ""
+        self.encrypted_password = ""
+        self.error: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"ImportedUser(line={self.line!r}, name={self.name!r})"
+
+
+def _normalize(value: object) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _user_from_row(line_number: int, row: Dict[str, object]) -> ImportedUser:
+    return ImportedUser(
+        line_number,
+        _normalize(row.get("phone")),
+        _normalize(row.get("password")),
+        _normalize(row.get("name")),
+    )
+
+
+def read_import_file(path: str) -> List[ImportedUser]:
+    users = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if not path.endswith(".jsonl"):
+            # 表头行为第 1 行
+            reader = csv.DictReader(f)
+            return [_user_from_row(n, row) for n, row in enumerate(reader, 2)]
+
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                user = ImportedUser(line_number, "")
+                user.error = "JSON 格式错误"
+                users.append(user)
+                continue
+            users.append(_user_from_row(line_number, row))
+    return users
+
+
+def hash_credentials(users: List[ImportedUser], default_password: str) -> None:
+    # 同一批次中重复的密码（如统一的初始密码）只计算一次
+    hashed: Dict[str, str] = {}
+    for user in users:
+        if user.error is not None:
+            continue
+        if not user.phone:
+            user.error = "缺少手机号"
+            continue
+        if not user.password and not default_password:
+            user.error = "缺少密码且未配置默认密码"
+            continue
+
+        user.encrypted_phone = md5_encrypt(user.phone)
+        if not user.password:
+            user.encrypted_password = default_password
+            continue
+        encrypted_password = hashed.get(user.password)
+        if encrypted_password is None:
+            encrypted_password = hashed[user.password] = md5_encrypt(user.password)
+        user.encrypted_password = encrypted_password
+
+
+class UserImporter:
+    def __init__(
+        self,
+        config_manager: ConfigManager,
+        verify: bool = False,
+        max_workers: int = IMPORT_MAX_WORKERS,
+        user_deadline: float = REPORT_USER_DEADLINE,
+    ):
+        self.config_manager = config_manager
+        self.login_manager = LoginManager(config_manager)
+        self.verify = verify
+        self.max_workers = max_workers
+        self.user_deadline = user_deadline
+
+    def run(self, path: str) -> Tuple[int, int, List[ImportedUser]]:
+        started = time.perf_counter()
+        users = read_import_file(path)
+        config = self.config_manager.load_config()
+        hash_credentials(users, config["default_password"])
+
+        # 同一手机号出现多次时以最后一条为准
+        unique: Dict[str, ImportedUser] = {}
+        for user in users:
+            if user.error is None:
+                unique[user.encrypted_phone] = user
+        candidates = list(unique.values())
+
+        if self.verify and candidates:
+            logger.info("正在验证 {} 个用户的登录凭据...", len(candidates))
+            workers = max(1, min(self.max_workers, len(candidates)))
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="inspur-import"
+            ) as executor:
+                list(executor.map(self._verify_user, candidates))
+
+        accepted = [user for user in candidates if user.error is None]
+        added = updated = 0
+        if accepted:
+            added, updated = self.config_manager.add_users(
+                (
+                    user.encrypted_phone,
+                    user.encrypted_password,
+                    # 配置中只保存手机号哈希，没有姓名时不写入明文手机号
+                    user.name or mask_phone(user.phone),
+                )
+                for user in accepted
+            )
+
+        failed = [user for user in users if user.error is not None]
+        logger.info(
+            "导入完成，用时 {:.2f} 秒：共 {} 行，新增 {} 个，更新 {} 个，失败 {} 个",
+            time.perf_counter() - started,
+            len(users),
+            added,
+            updated,
+            len(failed),
+        )
+        for user in failed:
+            logger.warning("第 {} 行导入失败: {}", user.line, user.error)
+        return added, updated, failed
+
+    def _verify_user(self, user: ImportedUser) -> None:
+        client = None
+        try:
+            with deadline_scope(self.user_deadline):
+                login_result = self.login_manager.login_with_credentials(
+                    user.encrypted_phone, user.encrypted_password, is_encrypted=True
+                )
+            if not login_result["success"]:
+                user.error = login_result.get("error") or "登录失败"
+                return
+
+            client = login_result["logged_in_inspur"]
+            if not user.name and client.user_info:
+                user.name = client.user_info.user_name
+        except Exception as e:
+            user.error = str(e)
+        finally:
+            if client is not None:
+                client.close()
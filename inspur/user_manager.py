@@ -3,6 +3,7 @@ from typing import Any, Dict, Optional, Tuple
 from inspur.config_manager import ConfigManager
 from inspur.inspur_client import (InspurClient, md5_encrypt)
 from inspur.login_manager import LoginManager
+from inspur.prefetcher import Prefetcher
 from utils.common_utils import get_user_choice_from_list
 from utils.logger import get_logger
 
@@ -12,7 +13,8 @@ logger = get_logger(__name__)
 class UserManager:
     def __init__(self, config_manager: ConfigManager):
         self.config_manager = config_manager
-        self.login_manager = LoginManager(config_manager)
+        self.prefetcher = Prefetcher(config_manager)
+        self.login_manager = LoginManager(config_manager, self.prefetcher)
         self.max_login_attempts = 3
 
     def process_successful_login(
@@ -23,7 +25,7 @@ class UserManager:
     ) -> Tuple[str, InspurClient]:
         logged_in_client = login_result.get("logged_in_inspur")
         if logged_in_client and logged_in_client.user_info:
-            actual_username = logged_in_client.user_info["user_name"]
+            actual_username = logged_in_client.user_info.user_name
         else:
             user_info = login_result["data"]["result"]
             actual_username = user_info["USER_NAME"]
@@ -86,9 +88,7 @@ class UserManager:
         config = self.config_manager.load_config()
         if config["default_password"]:
             try:
-                temp_client = InspurClient(
-                    random_radius_meters=config["random_radius_meters"]
-                )
+                temp_client = self.login_manager.create_client(config)
                 login_result = temp_client.login_with_encrypted_credentials(
                     encrypted_new_phone, config["default_password"]
                 )
@@ -156,6 +156,13 @@ class UserManager:
         return None
 
     def switch_user(self) -> Optional[Tuple[str, str, bool, InspurClient]]:
+        self.prefetcher.start_warmup()
+        credentials = self._switch_user()
+        if credentials:
+            self.prefetcher.prefetch_monthly_attendance(credentials[3])
+        return credentials
+
+    def _switch_user(self) -> Optional[Tuple[str, str, bool, InspurClient]]:
         all_users = self.config_manager.get_all_users()
 
         if not all_users:
@@ -169,6 +176,13 @@ class UserManager:
         return self._handle_user_selection(all_users, choice_num)
 
     def get_user_credentials(self) -> Optional[Tuple[str, str, bool, InspurClient]]:
+        self.prefetcher.start_warmup()
+        credentials = self._get_user_credentials()
+        if credentials:
+            self.prefetcher.prefetch_monthly_attendance(credentials[3])
+        return credentials
+
+    def _get_user_credentials(self) -> Optional[Tuple[str, str, bool, InspurClient]]:
         all_users = self.config_manager.get_all_users()
         config = self.config_manager.load_config()
         current_user = config["current_user"]
@@ -224,9 +238,7 @@ class UserManager:
 
         if config["default_password"]:
             try:
-                temp_client = InspurClient(
-                    random_radius_meters=config["random_radius_meters"]
-                )
+                temp_client = self.login_manager.create_client(config)
                 login_result = temp_client.login_with_encrypted_credentials(
                     encrypted_phone, config["default_password"]
                 )
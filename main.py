@@ -1,20 +1,76 @@
-from typing import Optional
-
-from inspur.config_manager import ConfigManager
+import argparse
+import threading
+from concurrent.futures import Future
+from contextlib import nullcontext
+from datetime import datetime
+from typing import List, Optional
+
+from inspur.api_server import serve
+from inspur.attendance_report import AttendanceReporter
+from inspur.attendance_verifier import AttendanceVerifier
+from inspur.config_manager import get_config_manager
+from inspur.config_watcher import ConfigChanges, ConfigWatcher
+from inspur.diagnostics import NetworkDoctor
+from inspur.http_cache import configure_http_cache
 from inspur.inspur_client import InspurClient
+from inspur.login_manager import LoginManager
+from inspur.models import sites_to_config
+from inspur.outbox_drainer import OutboxDrainer
+from inspur.rate_limiter import configure_rate_limits
+from inspur.site_discovery import SiteDiscoverer, parse_coordinate
+from inspur.transport import close_transports, configure_transport
+from inspur.user_import import UserImporter
 from inspur.user_manager import UserManager
 from utils.common_utils import get_numeric_choice
+from utils.constants import (API_CLIENT_IDLE_TIMEOUT, API_SERVER_HOST,
+                             API_SERVER_PORT, CASSETTE_REPLAY_SPEED,
+                             CONFIG_WRITE_BEHIND, DISCOVERY_MAX_WORKERS,
+                             DOCTOR_SAMPLES, HTTP_CACHE_ENABLED,
+                             HTTP_TRANSPORT, IMPORT_MAX_WORKERS, PROFILE_DIR,
+                             REPORT_MAX_WORKERS, REQUEST_TIMEOUT)
 from utils.logger import get_logger, setup_logging
+from utils.metrics import get_metrics
+from utils.profiler import ActionProfiler
+from utils.table_renderer import configure_table_output
+from utils.tracing import configure_tracing, shutdown_tracing
 
 logger = get_logger(__name__)
 
+MENU_ACTION_NAMES = {
+    "1": "check_in",
+    "2": "check_out",
+    "3": "query",
+    "4": "switch_user",
+    "5": "reselect_site",
+}
+
 
 class InspurSystem:
-    def __init__(self) -> None:
-        self.config_manager = ConfigManager()
+    def __init__(self, profiler: Optional[ActionProfiler] = None) -> None:
+        self.profiler = profiler
+        self.config_manager = get_config_manager()
         self.user_manager = UserManager(self.config_manager)
+        self.attendance_verifier = AttendanceVerifier()
+        self._pending_verifications: List[Future] = []
+        self.outbox_drainer = OutboxDrainer()
+        # 菜单操作与离线队列重放互斥，避免两者同时在当前客户端上提交考勤
+        self._client_lock = threading.Lock()
+        self.config_watcher = ConfigWatcher(self.config_manager)
+        self.config_watcher.subscribe(self._apply_config_changes)
         self.inspur: Optional[InspurClient] = None
 
+    def _apply_config_changes(self, changes: ConfigChanges) -> None:
+        if "log_level" in changes:
+            setup_logging(changes["log_level"][1])
+        if "rate_limit" in changes:
+            configure_rate_limits(changes["rate_limit"][1])
+        if "random_radius_meters" in changes and self.inspur:
+            self.inspur.random_radius_meters = changes["random_radius_meters"][1]
+        if "base_urls" in changes:
+            logger.info("服务器地址变更将在重新启动后生效")
+        if "http_cache" in changes:
+            logger.info("HTTP 缓存设置将在重新启动后生效")
+
     def _validate_inspur_client(self) -> bool:
         if not self.inspur:
             logger.error("客户端未初始化")
@@ -33,32 +89,17 @@ class InspurSystem:
             return False
 
         if attendance_result["attendanceSites"]:
-            sites = attendance_result["attendanceSites"]
-            selected_site_data = self.inspur._select_attendance_site(sites, "考勤")
-
-            if selected_site_data:
-                selected_site = {
-                    "id": str(selected_site_data["id"]),
-                    "latitude": selected_site_data["latitude"],
-                    "longitude": selected_site_data["longitude"],
-                    "address": selected_site_data["address"],
-                }
+            sites = self.inspur.parse_attendance_sites(attendance_result)
+            selected_site = self.inspur._select_attendance_site(sites, "考勤")
+
+            if selected_site:
                 self.inspur.attendance_site = selected_site
 
-                config_manager = ConfigManager()
-                attendance_sites = {
-                    site["address"]: {
-                        "id": str(site["id"]),
-                        "latitude": site["latitude"],
-                        "longitude": site["longitude"],
-                    }
-                    for site in sites
-                }
-                site_address = selected_site["address"]
-                config_manager.save_attendance_sites(attendance_sites)
-                config_manager.save_checkin_site(site_address)
-
-                logger.info("✓ 已选择考勤点: {}", selected_site["address"])
+                config_manager = get_config_manager()
+                config_manager.merge_attendance_sites(sites_to_config(sites))
+                config_manager.save_checkin_site(selected_site.address)
+
+                logger.info("✓ 已选择考勤点: {}", selected_site.address)
                 return True
             else:
                 logger.warning("未选择考勤点，操作取消")
@@ -70,21 +111,43 @@ class InspurSystem:
             return False
 
     def process_attendance_query(
-        self, inspur: InspurClient, config: dict, action_type: str = ""
-    ) -> None:
-        if config["auto_query_after_check"]:
-            # 自动查询考勤记录
-            inspur.get_monthly_attendance(last_only=True, action_type=action_type)
-        else:
+        self,
+        inspur: InspurClient,
+        config: dict,
+        action_type: str = "",
+        started_at: Optional[datetime] = None,
+    ) -> bool:
+        if not config["auto_query_after_check"]:
             query_choice = input("是否需要查询考勤记录？(y/n): ").strip().lower()
-            if query_choice == "y":
-                inspur.get_monthly_attendance(last_only=True, action_type=action_type)
+            if query_choice != "y":
+                return False
+
+        # 后台确认考勤记录，不阻塞菜单；确认结果回到菜单循环再输出
+        self._pending_verifications.append(
+            self.attendance_verifier.submit(
+                inspur, action_type, action_type == "签退", started_at
+            )
+        )
+        return True
+
+    def _show_verified_records(self) -> None:
+        pending: List[Future] = []
+        for future in self._pending_verifications:
+            if not future.done():
+                pending.append(future)
+                continue
+            if future.cancelled() or future.exception() is not None:
+                continue
+            record = future.result()
+            if record is not None and self.inspur:
+                self.inspur._display_attendance_table([record])
+        self._pending_verifications = pending
 
     def re_select_attendance_site(self) -> None:
         if not self._validate_inspur_client():
             return
 
-        self.inspur.attendance_site = {}
+        self.inspur.attendance_site = None
         attendance_result = self.inspur.get_attendance_sites()
 
         if "error" in attendance_result:
@@ -95,38 +158,20 @@ class InspurSystem:
             logger.warning("未找到考勤点")
             return
 
-        sites = attendance_result["attendanceSites"]
-        selected_site_data = self.inspur._select_attendance_site(sites, "")
+        sites = self.inspur.parse_attendance_sites(attendance_result)
+        selected_site = self.inspur._select_attendance_site(sites, "")
 
-        if not selected_site_data:
+        if not selected_site:
             logger.warning("未选择考勤点")
             return
 
-        selected_site = {
-            "id": str(selected_site_data["id"]),
-            "latitude": selected_site_data["latitude"],
-            "longitude": selected_site_data["longitude"],
-            "address": selected_site_data["address"],
-        }
         self.inspur.attendance_site = selected_site
 
-        config_manager = ConfigManager()
-        attendance_sites = {
-            site["address"]: {
-                "id": str(site["id"]),
-                "latitude": site["latitude"],
-                "longitude": site["longitude"],
-            }
-            for site in sites
-        }
-        site_address = selected_site["address"]
-        config_manager.save_attendance_sites(attendance_sites)
-        config_manager.save_checkin_site(site_address)
-
-        logger.info(
-            "已重新选择考勤点: {}",
-            self.inspur.attendance_site["address"],
-        )
+        config_manager = get_config_manager()
+        config_manager.merge_attendance_sites(sites_to_config(sites))
+        config_manager.save_checkin_site(selected_site.address)
+
+        logger.info("已重新选择考勤点: {}", selected_site.address)
 
     def _display_main_menu(self) -> None:
         logger.info("请选择操作：")
@@ -146,10 +191,18 @@ class InspurSystem:
         check_method = self.inspur.check_in if choice == "1" else self.inspur.check_out
 
         logger.info("")
+        started_at = datetime.now()
         check_result = check_method()
 
         if check_result and check_result.get("success"):
-            self.process_attendance_query(self.inspur, config, action_name)
+            # 签到后本月预取结果已失效：后台确认成功时会用确认后的记录重新填充，
+            # 不确认时在这里重新预取一次
+            if not self.process_attendance_query(
+                self.inspur, config, action_name, started_at
+            ):
+                self.user_manager.prefetcher.prefetch_monthly_attendance(self.inspur)
+        elif check_result and check_result.get("queued"):
+            logger.info("{}请求已保存，网络恢复后将自动提交", action_name)
         else:
             logger.warning("签到/签退操作未完成")
 
@@ -160,41 +213,95 @@ class InspurSystem:
         logger.info("请选择查询类型：")
         logger.info("a) 查询当前月考勤记录")
         logger.info("b) 查询指定月份考勤记录")
-        logger.info("c) 返回主菜单")
+        logger.info("c) 查询多个月份考勤记录（本地库）")
+        logger.info("d) 返回主菜单")
         logger.info("")
 
-        query_type = input("请选择 (a/b/c): ").strip().lower()
+        query_type = input("请选择 (a/b/c/d): ").strip().lower()
         logger.info("")
 
         if query_type == "a":
             self.inspur.get_monthly_attendance(last_only=False)
         elif query_type == "b":
-            month_input = input("请输入月份 (格式: YYYY-MM，如 2025-01): ").strip()
+            month_input = self._input_month("请输入月份 (格式: YYYY-MM，如 2025-01): ")
+            if month_input:
+                try:
+                    self.inspur.get_monthly_attendance(month=month_input)
+                except Exception as e:
+                    logger.error("查询失败: {}", e)
+        elif query_type == "c":
+            start_month = self._input_month("请输入起始月份 (格式: YYYY-MM): ")
+            if not start_month:
+                return
+            end_month = self._input_month(
+                "请输入结束月份 (格式: YYYY-MM，回车为当前月): ", allow_empty=True
+            )
+            if end_month is None:
+                return
+            end_month = end_month or datetime.now().strftime("%Y-%m")
+            if end_month < start_month:
+                logger.warning("结束月份不能早于起始月份")
+                return
             try:
-                # 验证输入格式
-                parts = month_input.split("-")
-                if len(parts) == 2 and len(parts[0]) == 4 and len(parts[1]) == 2:
-                    year, month = parts
-                    if year.isdigit() and month.isdigit():
-                        self.inspur.get_monthly_attendance(month=month_input)
-                        return
-                logger.warning("月份格式不正确")
+                result = self.inspur.query_attendance_history(start_month, end_month)
+                if result["success"] and not result["records"]:
+                    logger.info("没有考勤记录")
+                elif not result["success"]:
+                    logger.error("查询失败: {}", result["error"])
             except Exception as e:
                 logger.error("查询失败: {}", e)
-        elif query_type == "c":
+        elif query_type == "d":
             return
         else:
             logger.warning("无效选择")
 
+    def _input_month(self, prompt: str, allow_empty: bool = False) -> Optional[str]:
+        month_input = input(prompt).strip()
+        if not month_input and allow_empty:
+            return ""
+        # 验证输入格式
+        parts = month_input.split("-")
+        if len(parts) == 2 and len(parts[0]) == 4 and len(parts[1]) == 2:
+            year, month = parts
+            if year.isdigit() and month.isdigit() and 1 <= int(month) <= 12:
+                return month_input
+        logger.warning("月份格式不正确")
+        return None
+
+    def _profile_action(self, choice: str):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.profile(MENU_ACTION_NAMES[choice])
+
+    def _dispatch_menu_choice(self, choice: str, config: dict) -> None:
+        if choice in ["1", "2"]:
+            self._handle_attendance_action(choice, config)
+
+        elif choice == "3":
+            self._handle_query_action()
+
+        elif choice == "4":
+            result = self.user_manager.switch_user()
+            if result:
+                phone, password, used_saved_password, logged_in_inspur = result
+                self.inspur = logged_in_inspur
+                self.outbox_drainer.register(self.inspur, self._client_lock)
+
+        elif choice == "5":
+            self.re_select_attendance_site()
+
     def run(self) -> None:
         config = self.config_manager.load_config()
         setup_logging(config["log_level"])
+        configure_rate_limits(config["rate_limit"])
+        self.config_watcher.start()
 
         logger.info("=== 移动考勤 ===")
 
         try:
             self.inspur = InspurClient(
                 base_url=config["base_url"],
+                base_urls=config["base_urls"],
                 random_radius_meters=config["random_radius_meters"],
             )
             logger.info("")
@@ -212,6 +319,8 @@ class InspurSystem:
 
                 if logged_in_inspur:
                     self.inspur = logged_in_inspur
+                    self.outbox_drainer.register(self.inspur, self._client_lock)
+                    self.outbox_drainer.start()
                     break
                 else:
                     logger.error("登录失败，请重新输入凭据")
@@ -221,6 +330,7 @@ class InspurSystem:
 
             try:
                 while True:
+                    self._show_verified_records()
                     self._display_main_menu()
 
                     choice = get_numeric_choice("请输入选择 (1-6): ", 1, 6, 3)
@@ -232,28 +342,17 @@ class InspurSystem:
                     choice_str = str(choice)
                     logger.info("")
 
-                    if choice_str in ["1", "2"]:
-                        self._handle_attendance_action(choice_str, config)
-
-                    elif choice_str == "3":
-                        self._handle_query_action()
-
-                    elif choice_str == "4":
-                        result = self.user_manager.switch_user()
-                        if result:
-                            phone, password, used_saved_password, logged_in_inspur = (
-                                result
-                            )
-                            self.inspur = logged_in_inspur
-
-                    elif choice_str == "5":
-                        self.re_select_attendance_site()
-                        continue
-
-                    elif choice_str == "6":
+                    if choice_str == "6":
                         logger.info("感谢使用，程序退出！")
                         break
 
+                    with self._client_lock, self._profile_action(choice_str):
+                        self._dispatch_menu_choice(
+                            choice_str, self.config_manager.load_config()
+                        )
+                    if choice_str == "5":
+                        continue
+
                     logger.info("")
                     logger.info("-" * 50)
                     logger.info("")
@@ -264,6 +363,8 @@ class InspurSystem:
                 logger.error("程序执行出错: {}", e)
                 logger.exception("异常堆栈")
             finally:
+                # 先停止后台确认，避免其在已关闭的会话上继续请求
+                self.attendance_verifier.shutdown(wait=True)
                 if self.inspur:
                     self.inspur.close()
                     logger.info("会话已关闭")
@@ -271,17 +372,248 @@ class InspurSystem:
         except Exception as e:
             logger.error("系统初始化失败: {}", e)
             logger.exception("异常堆栈")
+        finally:
+            self.user_manager.prefetcher.shutdown()
+            self.attendance_verifier.shutdown()
+            self.outbox_drainer.shutdown()
+            self.config_watcher.stop()
+            if self.profiler is not None:
+                self.profiler.report()
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pyinspur", description="浪潮考勤自动化脚本")
+    parser.add_argument(
+        "--transport",
+        choices=("requests", "httpx"),
+        default=HTTP_TRANSPORT,
+        help="HTTP 传输实现（httpx 支持 HTTP/2，需额外安装）",
+    )
+    parser.add_argument("--record", metavar="PATH", help="录制请求到回放文件（.jsonl.gz）")
+    parser.add_argument("--replay", metavar="PATH", help="使用回放文件离线运行")
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=CASSETTE_REPLAY_SPEED,
+        help="回放速度倍数，0 表示不模拟响应耗时",
+    )
+    parser.add_argument(
+        "--trace", metavar="PATH", help="记录操作耗时链路到 JSON Lines 文件"
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="对每个菜单操作做性能分析"
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default=PROFILE_DIR,
+        metavar="DIR",
+        help=f"性能分析结果保存目录（默认 {PROFILE_DIR}）",
+    )
+    parser.add_argument(
+        "--no-log", action="store_true", help="表格只显示在终端，不写入日志文件"
+    )
+    parser.add_argument(
+        "--no-pager", action="store_true", help="表格超过一屏时不使用分页器"
+    )
+    parser.add_argument(
+        "--write-behind",
+        action="store_true",
+        default=CONFIG_WRITE_BEHIND,
+        help="配置修改先保存在内存中，由后台线程延迟写入磁盘",
+    )
+    parser.add_argument(
+        "--http-cache",
+        action="store_true",
+        default=HTTP_CACHE_ENABLED,
+        help="缓存考勤点和考勤记录查询响应（也可在配置中设置 http_cache）",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    serve_parser = subparsers.add_parser("serve", help="启动本地 HTTP/JSON API 服务")
+    serve_parser.add_argument("--host", default=API_SERVER_HOST, help="监听地址")
+    serve_parser.add_argument(
+        "--port", type=int, default=API_SERVER_PORT, help="监听端口"
+    )
+    serve_parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=API_CLIENT_IDLE_TIMEOUT,
+        help="空闲客户端回收时间（秒）",
+    )
+
+    report_parser = subparsers.add_parser("report", help="并发查询所有已保存用户的考勤记录")
+    report_parser.add_argument("--month", help="查询月份（YYYY-MM），默认当前月")
+    report_parser.add_argument(
+        "--workers", type=int, default=REPORT_MAX_WORKERS, help="并发查询数"
+    )
+    report_parser.add_argument("--csv", metavar="PATH", help="导出为 CSV 文件")
+    report_parser.add_argument(
+        "--local", action="store_true", help="只读取本地考勤库，不联网查询"
+    )
+
+    import_parser = subparsers.add_parser("import", help="从 CSV/JSONL 文件批量导入用户")
+    import_parser.add_argument(
+        "path", help="用户文件（CSV 表头或 JSONL 字段为 phone、password、name）"
+    )
+    import_parser.add_argument(
+        "--verify", action="store_true", help="导入前并发登录验证凭据"
+    )
+    import_parser.add_argument(
+        "--workers", type=int, default=IMPORT_MAX_WORKERS, help="并发验证数"
+    )
+
+    discover_parser = subparsers.add_parser(
+        "discover", help="并发查询多个坐标附近的考勤点并合并保存"
+    )
+    discover_parser.add_argument(
+        "coordinates",
+        nargs="*",
+        type=parse_coordinate,
+        metavar="经度,纬度",
+        help="查询坐标，默认使用配置中的坐标和已保存考勤点的坐标",
+    )
+    discover_parser.add_argument(
+        "--file", metavar="PATH", help="从文件读取坐标，每行一个 经度,纬度"
+    )
+    discover_parser.add_argument(
+        "--workers", type=int, default=DISCOVERY_MAX_WORKERS, help="并发查询数"
+    )
+
+    doctor_parser = subparsers.add_parser("doctor", help="诊断到考勤服务器的网络状况")
+    doctor_parser.add_argument(
+        "--samples", type=int, default=DOCTOR_SAMPLES, help="每个接口的采样次数"
+    )
+    doctor_parser.add_argument(
+        "--timeout", type=float, default=REQUEST_TIMEOUT, help="单次请求超时（秒）"
+    )
+    return parser
+
+
+def run_report(args: argparse.Namespace) -> None:
+    config_manager = get_config_manager()
+    config = config_manager.load_config()
+    setup_logging(config["log_level"])
+    configure_rate_limits(config["rate_limit"])
+
+    reporter = AttendanceReporter(config_manager, max_workers=args.workers)
+    reports = reporter.collect(args.month, local=args.local)
+    if not reports:
+        return
+    reporter.display(reports)
+    if args.csv:
+        reporter.export_csv(reports, args.csv)
+
+
+def run_import(args: argparse.Namespace) -> None:
+    config_manager = get_config_manager()
+    config = config_manager.load_config()
+    setup_logging(config["log_level"])
+    configure_rate_limits(config["rate_limit"])
+
+    importer = UserImporter(
+        config_manager, verify=args.verify, max_workers=args.workers
+    )
+    importer.run(args.path)
+
+
+def run_discover(args: argparse.Namespace) -> None:
+    config_manager = get_config_manager()
+    config = config_manager.load_config()
+    setup_logging(config["log_level"])
+    configure_rate_limits(config["rate_limit"])
+
+    coordinates = list(args.coordinates)
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            coordinates.extend(parse_coordinate(line) for line in f if line.strip())
+
+    users = config_manager.get_all_users()
+    if not users:
+        logger.error("没有保存的用户，请先登录")
+        return
+    # 优先使用当前用户登录
+    encrypted_phone, user_data = next(
+        (
+            (phone, data)
+            for phone, data in users.items()
+            if data["username"] == config["current_user"]
+        ),
+        next(iter(users.items())),
+    )
+    login_result = LoginManager(config_manager).login_with_credentials(
+        encrypted_phone, user_data["password"], is_encrypted=True
+    )
+    if not login_result["success"]:
+        logger.error("登录失败: {}", login_result.get("error") or "未知错误")
+        return
+
+    client = login_result["logged_in_inspur"]
+    try:
+        discoverer = SiteDiscoverer(client, config_manager, max_workers=args.workers)
+        discoverer.discover_and_merge(coordinates)
+    finally:
+        client.close()
+
+
+def run_doctor(args: argparse.Namespace) -> None:
+    config = get_config_manager().load_config()
+    setup_logging(config["log_level"])
+
+    for base_url in config["base_urls"]:
+        doctor = NetworkDoctor(base_url, samples=args.samples, timeout=args.timeout)
+        results, keepalive = doctor.run()
+        doctor.display(results, keepalive)
 
 
-def main() -> None:
+def run_api_server(args: argparse.Namespace) -> None:
+    config_manager = get_config_manager()
+    config = config_manager.load_config()
+    setup_logging(config["log_level"])
+    configure_rate_limits(config["rate_limit"])
+    serve(args.host, args.port, args.idle_timeout, config_manager)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_arg_parser().parse_args(argv)
     try:
-        system = InspurSystem()
+        configure_transport(
+            args.transport, args.record, args.replay, args.replay_speed
+        )
+        configure_tracing(args.trace)
+        configure_table_output(log=not args.no_log, pager=not args.no_pager)
+        if args.write_behind:
+            get_config_manager().set_write_behind(True)
+        if args.http_cache or get_config_manager().load_config()["http_cache"]:
+            configure_http_cache(True)
+        if args.command == "serve":
+            run_api_server(args)
+            return
+        if args.command == "report":
+            run_report(args)
+            return
+        if args.command == "import":
+            run_import(args)
+            return
+        if args.command == "discover":
+            run_discover(args)
+            return
+        if args.command == "doctor":
+            run_doctor(args)
+            return
+
+        profiler = ActionProfiler(args.profile_dir) if args.profile else None
+        system = InspurSystem(profiler)
         system.run()
     except KeyboardInterrupt:
         logger.warning("程序被用户中断")
     except Exception as e:
         logger.error("程序启动失败: {}", e)
         logger.exception("异常堆栈")
+    finally:
+        get_config_manager().close()
+        close_transports()
+        shutdown_tracing()
+        get_metrics().report()
 
 
 if __name__ == "__main__":
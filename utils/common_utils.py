@@ -10,6 +10,12 @@ def md5_encrypt(text: str) -> str:
     return hashlib.md5(text.encode("utf-8")).hexdigest()
 
 
+def mask_phone(phone: str) -> str:
+    if len(phone) < 7:
+        return "*" * len(phone)
+    return f"{phone[:3]}****{phone[-4:]}"
+
+
 def validate_not_empty(value: str, field_name: str = "输入") -> bool:
     if not value or not value.strip():
         logger.warning(f"{field_name}不能为空！")
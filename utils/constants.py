@@ -3,4 +3,59 @@ DEFAULT_BASE_URL = "http://218.57.146.236:8070"
 EARTH_RADIUS_METERS = 111320
 PI = 3.141592653589793
 REQUEST_TIMEOUT = 10
+CONNECT_TIMEOUT = 5
+ATTENDANCE_ACTION_DEADLINE = 30
 MAX_RETRIES = 3
+API_SERVER_HOST = "127.0.0.1"
+API_SERVER_PORT = 8765
+API_CLIENT_IDLE_TIMEOUT = 900
+API_POOL_REAP_INTERVAL = 60
+PREFETCH_MAX_WORKERS = 2
+PREFETCH_TTL = 60
+VERIFY_MAX_ATTEMPTS = 4
+VERIFY_INITIAL_DELAY = 1
+VERIFY_CLOCK_SKEW_SECONDS = 120
+SNAPSHOT_MAX_ENTRIES = 64
+# 缓存内容包含各用户的考勤记录，默认关闭
+HTTP_CACHE_ENABLED = False
+HTTP_CACHE_DIR = "cache/http"
+HTTP_CACHE_MAX_BYTES = 32 * 1024 * 1024
+HTTP_CACHE_HEURISTIC_TTLS = {
+    "/urms/plugins/check/tcheckattendancesite/findForPhone.ilf": 3600,
+    "/urms/plugins/check/tcheckattendance/findPageForPhone.ilf": 30,
+}
+CIRCUIT_FAILURE_RATE_THRESHOLD = 0.5
+CIRCUIT_MINIMUM_CALLS = 4
+CIRCUIT_WINDOW_SECONDS = 60
+CIRCUIT_OPEN_SECONDS = 30
+CIRCUIT_HALF_OPEN_MAX_CALLS = 1
+RATE_LIMIT_PER_SECOND = 5
+RATE_LIMIT_BURST = 10
+OUTBOX_ENABLED = True
+OUTBOX_PATH = "data/outbox.db"
+OUTBOX_SYNCHRONOUS = "FULL"
+OUTBOX_DRAIN_INTERVAL = 30
+HTTP_TRANSPORT = "requests"
+CASSETTE_REPLAY_SPEED = 1.0
+PROFILE_DIR = "profiles"
+PROFILE_TOP_N = 20
+PROFILE_SAMPLE_INTERVAL = 0.005
+REPORT_MAX_WORKERS = 8
+REPORT_USER_DEADLINE = 60
+ENDPOINT_EWMA_ALPHA = 0.3
+ENDPOINT_ERROR_THRESHOLD = 0.5
+ENDPOINT_RECOVERY_SECONDS = 30
+ENDPOINT_FAILURE_LATENCY = 5
+DOCTOR_SAMPLES = 5
+DOCTOR_KEEPALIVE_REQUESTS = 3
+WAREHOUSE_ENABLED = True
+WAREHOUSE_PATH = "data/attendance.db"
+WAREHOUSE_CLOSE_GRACE_DAYS = 3
+WAREHOUSE_MAX_SYNC_MONTHS = 24
+CONFIG_WATCH_DEBOUNCE = 0.5
+CONFIG_WATCH_POLL_INTERVAL = 1.0
+CONFIG_WRITE_BEHIND = False
+CONFIG_FLUSH_DELAY = 1.0
+IMPORT_MAX_WORKERS = 8
+TABLE_PAGER = True
+DISCOVERY_MAX_WORKERS = 4
@@ -0,0 +1,70 @@
+import json
+from typing import Any, Callable, Dict, List, Union
+
+import requests
+
+JsonLoader = Callable[[Union[bytes, str]], Any]
+
+
+def _stdlib_loads(data: Union[bytes, str]) -> Any:
+    return json.loads(data)
+
+
+def _load_optional_backends() -> Dict[str, JsonLoader]:
+    backends: Dict[str, JsonLoader] = {}
+    try:
+        import orjson
+
+        backends["orjson"] = orjson.loads
+    except ImportError:
+        pass
+
+    try:
+        import ujson
+
+        backends["ujson"] = ujson.loads
+    except ImportError:
+        pass
+
+    backends["json"] = _stdlib_loads
+    return backends
+
+
+_backends = _load_optional_backends()
+_backend_name = next(iter(_backends))
+_loads = _backends[_backend_name]
+
+
+def available_backends() -> List[str]:
+    return list(_backends)
+
+
+def get_backend() -> str:
+    return _backend_name
+
+
+def set_backend(name: str) -> None:
+    global _backend_name, _loads
+    if name not in _backends:
+        raise ValueError(f"JSON 解析器不可用: {name}")
+    _backend_name = name
+    _loads = _backends[name]
+
+
+def register_backend(name: str, loader: JsonLoader) -> None:
+    _backends[name] = loader
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return _loads(data)
+
+
+def decode_response(response: requests.Response) -> Any:
+    encoding = (response.encoding or "utf-8").lower().replace("-", "")
+    data = response.content if encoding in ("utf8", "ascii") else response.text
+    try:
+        return _loads(data)
+    except ValueError as e:
+        raise requests.exceptions.InvalidJSONError(
+            f"响应不是有效的 JSON: {e}", response=response
+        )
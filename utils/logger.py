@@ -5,6 +5,11 @@ from datetime import datetime
 from loguru import logger as loguru_logger
 
 
+def _console_filter(record) -> bool:
+    # 已经通过分页器显示过的内容只写入日志文件
+    return not record["extra"].get("file_only")
+
+
 def setup_logging(log_level: str = "INFO") -> None:
     log_dir = "logs"
     os.makedirs(log_dir, exist_ok=True)
@@ -39,6 +44,7 @@ def setup_logging(log_level: str = "INFO") -> None:
         level=log_level.upper(),
         format=console_format,
         colorize=True,
+        filter=_console_filter,
     )
 
 
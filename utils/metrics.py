@@ -0,0 +1,116 @@
+import io
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._counters: Dict[MetricKey, float] = {}
+        self._histograms: Dict[MetricKey, Histogram] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> MetricKey:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def increment(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self._counters.items()
+                ],
+                "histograms": [
+                    dict(name=name, labels=dict(labels), **histogram.to_dict())
+                    for (name, labels), histogram in self._histograms.items()
+                ],
+            }
+
+    def summary(self) -> Optional[str]:
+        snapshot = self.snapshot()
+        # 全为 0 的耗时（如未发生限流等待）不输出
+        snapshot["histograms"] = [h for h in snapshot["histograms"] if h["max"] > 0]
+        if not snapshot["counters"] and not snapshot["histograms"]:
+            return None
+
+        buffer = io.StringIO()
+        if snapshot["counters"]:
+            buffer.write("计数:\n")
+            for counter in sorted(snapshot["counters"], key=_sort_key):
+                buffer.write(f"  {_format_name(counter)}  {counter['value']:g}\n")
+        if snapshot["histograms"]:
+            buffer.write("耗时:\n")
+            for histogram in sorted(snapshot["histograms"], key=_sort_key):
+                buffer.write(
+                    f"  {_format_name(histogram)}  次数 {histogram['count']:>4}  "
+                    f"平均 {histogram['avg']:8.3f}s  最长 {histogram['max']:8.3f}s\n"
+                )
+        return buffer.getvalue()
+
+    def report(self) -> None:
+        summary = self.summary()
+        if summary is None:
+            return
+        logger.info("运行指标:\n{}", summary.rstrip())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _sort_key(metric: Dict[str, Any]) -> Tuple[str, str]:
+    return metric["name"], repr(sorted(metric["labels"].items()))
+
+
+def _format_name(metric: Dict[str, Any]) -> str:
+    if not metric["labels"]:
+        return metric["name"]
+    labels = ",".join(f"{k}={v}" for k, v in sorted(metric["labels"].items()))
+    return f"{metric['name']}{{{labels}}}"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    return _registry
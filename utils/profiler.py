@@ -0,0 +1,121 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from utils.constants import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL, PROFILE_TOP_N
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class StackSampler:
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample_loop, name="inspur-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+
+    def _sample_loop(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+                    f"{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ActionProfiler:
+    def __init__(
+        self,
+        output_dir: str = PROFILE_DIR,
+        top_n: int = PROFILE_TOP_N,
+        sample_interval: float = PROFILE_SAMPLE_INTERVAL,
+    ):
+        self.output_dir = os.path.join(
+            output_dir, datetime.now().strftime("%Y%m%d-%H%M%S")
+        )
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+        self._profiles: List[cProfile.Profile] = []
+        self._durations: Dict[str, List[float]] = {}
+        self._sequence = 0
+
+    @contextmanager
+    def profile(self, action: str) -> Iterator[None]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._sequence += 1
+        prefix = os.path.join(self.output_dir, f"{self._sequence:03d}-{action}")
+
+        sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        profiler = cProfile.Profile()
+        sampler.start()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+            sampler.stop()
+
+            profiler.dump_stats(f"{prefix}.prof")
+            sampler.write_collapsed(f"{prefix}.collapsed")
+            self._profiles.append(profiler)
+            self._durations.setdefault(action, []).append(elapsed)
+            logger.debug("{} 耗时 {:.3f} 秒，性能数据: {}.prof", action, elapsed, prefix)
+
+    def summary(self) -> Optional[str]:
+        if not self._profiles:
+            return None
+
+        buffer = io.StringIO()
+        buffer.write("各操作耗时:\n")
+        for action, durations in self._durations.items():
+            buffer.write(
+                f"  {action:<16} 次数 {len(durations):>3}  "
+                f"合计 {sum(durations):8.3f}s  最长 {max(durations):8.3f}s\n"
+            )
+
+        stats = pstats.Stats(self._profiles[0], stream=buffer)
+        for profiler in self._profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(os.path.join(self.output_dir, "combined.prof"))
+        buffer.write(f"\n热点函数 Top {self.top_n}（按累计耗时）:\n")
+        stats.strip_dirs().sort_stats("cumulative").print_stats(self.top_n)
+        return buffer.getvalue()
+
+    def report(self) -> None:
+        summary = self.summary()
+        if summary is None:
+            return
+        logger.info("性能分析结果已保存到 {}\n{}", self.output_dir, summary)
@@ -0,0 +1,90 @@
+import pydoc
+import shutil
+import sys
+import unicodedata
+from typing import Optional, Sequence
+
+from utils.constants import TABLE_PAGER
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_options = {"log": True, "pager": TABLE_PAGER}
+
+
+def configure_table_output(log: bool = True, pager: bool = TABLE_PAGER) -> None:
+    _options["log"] = log
+    _options["pager"] = pager
+
+
+def display_width(text: str) -> int:
+    width = 0
+    for char in text:
+        if unicodedata.combining(char):
+            continue
+        width += 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+    return width
+
+
+def pad(text: str, width: int, align: str = "<") -> str:
+    fill = max(0, width - display_width(text))
+    if align == ">":
+        return " " * fill + text
+    if align == "^":
+        return " " * (fill // 2) + text + " " * (fill - fill // 2)
+    return text + " " * fill
+
+
+def render_table(
+    headers: Sequence[str],
+    rows: Sequence[Sequence[object]],
+    aligns: Optional[str] = None,
+    gap: int = 2,
+) -> str:
+    aligns = aligns or "<" * len(headers)
+    cells = [[str(cell) for cell in row] for row in rows]
+    widths = [display_width(header) for header in headers]
+    for row in cells:
+        for index, cell in enumerate(row):
+            widths[index] = max(widths[index], display_width(cell))
+
+    separator = "-" * (sum(widths) + gap * (len(widths) - 1))
+    spacing = " " * gap
+
+    def format_row(row: Sequence[str]) -> str:
+        return spacing.join(
+            pad(cell, widths[index], aligns[index]) for index, cell in enumerate(row)
+        ).rstrip()
+
+    lines = [separator, format_row(headers), separator]
+    lines.extend(format_row(row) for row in cells)
+    lines.append(separator)
+    return "\n".join(lines)
+
+
+def emit_table(text: str) -> None:
+    # 整张表一次写出，避免每行单独经过日志格式化和各个输出
+    use_pager = (
+        _options["pager"]
+        and sys.stdout.isatty()
+        and text.count("\n") + 1 > shutil.get_terminal_size().lines - 2
+    )
+    if use_pager:
+        pydoc.pager(text)
+        if _options["log"]:
+            logger.bind(file_only=True).opt(raw=True).info(text + "\n")
+        return
+
+    if not _options["log"]:
+        sys.stdout.write(text + "\n")
+        sys.stdout.flush()
+        return
+    logger.opt(raw=True).info(text + "\n")
+
+
+def print_table(
+    headers: Sequence[str],
+    rows: Sequence[Sequence[object]],
+    aligns: Optional[str] = None,
+) -> None:
+    emit_table(render_table(headers, rows, aligns))
@@ -0,0 +1,215 @@
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SERVICE_NAME = "pyinspur"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _format_time(ns: int) -> str:
+    dt = datetime.fromtimestamp(ns / 1e9, tz=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "events",
+        "status_code",
+        "status_description",
+        "_perf_start",
+        "_duration",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status_code = "UNSET"
+        self.status_description: Optional[str] = None
+        self._perf_start = time.perf_counter()
+        self._duration = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.events.append(
+            {
+                "name": "exception",
+                "timestamp": _format_time(time.time_ns()),
+                "attributes": {
+                    "exception.type": type(exc).__name__,
+                    "exception.message": str(exc),
+                },
+            }
+        )
+        self.status_code = "ERROR"
+        self.status_description = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        self._duration = time.perf_counter() - self._perf_start
+        self.end_ns = self.start_ns + int(self._duration * 1e9)
+
+    def to_dict(self) -> Dict[str, Any]:
+        status: Dict[str, Any] = {"status_code": self.status_code}
+        if self.status_description:
+            status["description"] = self.status_description
+        return {
+            "name": self.name,
+            "context": {
+                "trace_id": f"0x{self.trace_id}",
+                "span_id": f"0x{self.span_id}",
+            },
+            "kind": "SpanKind.INTERNAL",
+            "parent_id": f"0x{self.parent_id}" if self.parent_id else None,
+            "start_time": _format_time(self.start_ns),
+            "end_time": _format_time(self.end_ns or self.start_ns),
+            "duration_ms": round(self._duration * 1000, 3),
+            "status": status,
+            "attributes": self.attributes,
+            "events": self.events,
+            "resource": {"attributes": {"service.name": SERVICE_NAME}},
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonLinesExporter:
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+_exporter: Optional[JsonLinesExporter] = None
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class _SpanScope:
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span: Span):
+        self.span = span
+        self._token = None
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        span = self.span
+        if exc is not None:
+            span.record_exception(exc)
+        elif span.status_code == "UNSET":
+            span.status_code = "OK"
+        span.end()
+        _current_span.reset(self._token)
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(span)
+        return False
+
+
+def configure_tracing(path: Optional[str]) -> None:
+    global _exporter
+    shutdown_tracing()
+    if path:
+        _exporter = JsonLinesExporter(path)
+        logger.info("链路追踪已开启，输出到 {}", path)
+
+
+def shutdown_tracing() -> None:
+    global _exporter
+    exporter, _exporter = _exporter, None
+    if exporter is not None:
+        exporter.shutdown()
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+def current_span() -> Any:
+    if _exporter is None:
+        return NOOP_SPAN
+    return _current_span.get() or NOOP_SPAN
+
+
+def start_span(name: str, **attributes: Any) -> Any:
+    if _exporter is None:
+        return NOOP_SPAN
+    return _SpanScope(Span(name, _current_span.get(), attributes))
+
+
+def traced(name: str) -> Callable[[F], F]:
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _exporter is None:
+                return func(*args, **kwargs)
+            with _SpanScope(Span(name, _current_span.get())):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator